@@ -0,0 +1,162 @@
+"""
+Bounded in-memory cache with an optional SQLite tier.
+
+The memory tier is an LRU bounded by the approximate size of its entries in
+bytes, with a TTL per entry (a shorter one for negative entries such as
+"No relevant snippet found"). The disk tier, when a path is given, survives
+restarts and can be shared by several uvicorn workers on the same host.
+Values must be JSON-serializable.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# How many disk writes between sweeps of expired rows
+DISK_PRUNE_INTERVAL = 256
+
+
+class CacheStore:
+    def __init__(self, name: str, max_bytes: int, ttl_seconds: float,
+                 negative_ttl_seconds: float, disk_path: Optional[str] = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+        # key -> (value, expires_at, size)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "disk_hits": 0}
+
+        self._db = None
+        self._disk_writes = 0
+        if disk_path:
+            self._open_disk(disk_path)
+
+    # ---------- disk tier ----------
+
+    def _open_disk(self, disk_path: str):
+        try:
+            self._db = sqlite3.connect(disk_path, timeout=5, check_same_thread=False, isolation_level=None)
+            # WAL lets several worker processes read while one writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            print(f"💾 Cache '{self.name}' disk tier: {disk_path}")
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache '{self.name}' disk tier disabled: {e}")
+            self._db = None
+
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.name, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Cache '{self.name}' disk read error: {e}")
+            return None
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _disk_set(self, key: str, encoded: str, expires_at: float):
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.name, key, encoded, expires_at)
+            )
+            self._disk_writes += 1
+            if self._disk_writes % DISK_PRUNE_INTERVAL == 0:
+                self._db.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+                    (self.name, time.time())
+                )
+        except sqlite3.Error as e:
+            print(f"Cache '{self.name}' disk write error: {e}")
+
+    # ---------- memory tier ----------
+
+    def _store(self, key: str, value: Any, expires_at: float, size: int):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[2]
+        if size > self.max_bytes:
+            return  # Larger than the whole cache, keep it on disk only
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._counters["evictions"] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > time.time():
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return entry[0]
+                del self._entries[key]
+                self._bytes -= entry[2]
+                self._counters["expirations"] += 1
+
+            disk_entry = self._disk_get(key)
+            if disk_entry is not None:
+                value, expires_at = disk_entry
+                self._store(key, value, expires_at, len(key) + len(json.dumps(value)))
+                self._counters["hits"] += 1
+                self._counters["disk_hits"] += 1
+                return value
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any, negative: bool = False, ttl_seconds: Optional[float] = None):
+        """Store a value. Negative entries (known misses) use the shorter negative TTL."""
+        if ttl_seconds is None:
+            ttl_seconds = self.negative_ttl_seconds if negative else self.ttl_seconds
+        expires_at = time.time() + ttl_seconds
+        encoded = json.dumps(value)
+        with self._lock:
+            self._store(key, value, expires_at, len(key) + len(encoded))
+            self._disk_set(key, encoded, expires_at)
+
+    def delete(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, key))
+                except sqlite3.Error as e:
+                    print(f"Cache '{self.name}' disk delete error: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else 0.0,
+                "disk_enabled": self._db is not None
+            }
@@ -0,0 +1,291 @@
+"""
+Near-duplicate index over previously verified claims.
+
+Claims are reduced to character shingles of their (stemmed) content words,
+hashed into MinHash signatures and bucketed with LSH banding, so a lookup only compares against the handful of
+claims that share a band instead of the whole index. Everything runs locally
+(NumPy only, no external service).
+
+Signatures live in one preallocated matrix used as a ring buffer, and the LSH
+band keys in a single sorted array searched with np.searchsorted, so memory
+stays at a few hundred bytes per claim and lookups stay well under a
+millisecond at hundreds of thousands of claims.
+
+Two claims are duplicates when their estimated Jaccard similarity reaches the
+threshold, so rewordings like "X CEO resigned" / "CEO of X has resigned
+today" or "Biden wins the election" / "Biden won the election" match.
+A few targeted guards stop reuse across claims that look alike but say
+different things:
+
+- negation and quoted numbers must be the same ("is safe" vs "is not safe")
+- one claim may add or drop words, but not swap one for another
+  ("...in Paris" vs "...in Berlin", "...on Mars" vs "...on the Moon")
+- the words both claims share must come in the same order, after "A of B"
+  is read as "B A" ("Russia invaded Ukraine" vs "Ukraine invaded Russia")
+"""
+import re
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sentence_ranker import stem
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 8  # Bands x rows use the first 32 permutations; all 64 are used to estimate similarity
+LSH_ROWS = 4
+SHINGLE_SIZE = 4
+MERGE_EVERY = 1024  # Recent band keys are kept in a dict until this many are merged into the sorted array
+
+# Mersenne prime for the universal hash family; shingle hashes are masked below it
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20251223)  # Fixed seed so signatures are stable across processes
+_HASH_A = _rng.randint(1, _PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_HASH_B = _rng.randint(0, _PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_BAND_MIX = _rng.randint(1, _PRIME, size=(LSH_BANDS, LSH_ROWS)).astype(np.uint64)
+_BAND_SALT = np.arange(LSH_BANDS, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+STOPWORDS = {
+    'a', 'an', 'the', 'of', 'to', 'in', 'on', 'at', 'for', 'by', 'with', 'from', 'and', 'or',
+    'is', 'are', 'was', 'were', 'be', 'been', 'has', 'have', 'had', 'it', 'its', 'this', 'that',
+    'today', 'just', 'now', 'reportedly', 'breaking', 'says', 'said', 'report', 'reports',
+    'also', 'officially', 'actually', 'located'
+}
+NEGATIONS = {'not', 'no', 'never', 'none', 'nobody', 'nothing', 'neither', 'nor', 'denies', 'denied', 'false', 'fake'}
+# Irregular verb forms the suffix stemmer can't join with their base form
+IRREGULAR = {
+    'won': 'win', 'lost': 'lose', 'went': 'go', 'gone': 'go', 'took': 'take', 'taken': 'take',
+    'made': 'make', 'found': 'find', 'left': 'leave', 'ran': 'run', 'began': 'begin', 'begun': 'begin',
+    'became': 'become', 'held': 'hold', 'sold': 'sell', 'bought': 'buy', 'paid': 'pay', 'met': 'meet',
+    'told': 'tell', 'gave': 'give', 'given': 'give', 'fell': 'fall', 'fallen': 'fall', 'rose': 'rise',
+    'risen': 'rise', 'struck': 'strike', 'shot': 'shoot', 'wrote': 'write', 'written': 'write',
+    'spoke': 'speak', 'spoken': 'speak', 'chose': 'choose', 'chosen': 'choose', 'died': 'die', 'dies': 'die'
+}
+ARTICLES = {'a', 'an', 'the'}
+
+
+def _read_genitives(words: List[str]) -> List[str]:
+    """"ceo of x" -> "x ceo", so possessive rewordings keep their words in the same order."""
+    out: List[str] = []
+    i = 0
+    while i < len(words):
+        j = i + 2
+        if j < len(words) and words[j] in ARTICLES:
+            j += 1
+        if (i + 1 < len(words) and words[i + 1] == 'of' and j < len(words)
+                and words[i] not in STOPWORDS and words[j] not in STOPWORDS):
+            out += [words[j], words[i]]
+            i = j + 1
+        else:
+            out.append(words[i])
+            i += 1
+    return out
+
+
+def claim_features(claim: str) -> Tuple[Set[str], tuple, tuple, tuple]:
+    """Returns (shingles, negation words, numbers, ordered content-word stems without numbers) for a claim."""
+    negations = set()
+    numbers = set()
+    shingles = set()
+    content = []
+    for word in _read_genitives(re.findall(r"[a-z0-9]+(?:'[a-z]+)?", claim.lower())):
+        if word.endswith("n't"):
+            negations.add('not')
+            word = word[:-3]
+        if word in NEGATIONS:
+            negations.add(word)
+            continue
+        if word.isdigit():
+            numbers.add(word)
+        if word in STOPWORDS:
+            continue
+        word = IRREGULAR.get(word) or stem(word)
+        if not word.isdigit():
+            content.append(word)  # Numbers have their own guard; they don't take part in word order
+
+        padded = f" {word} "
+        if len(padded) <= SHINGLE_SIZE:
+            shingles.add(padded)
+        else:
+            for i in range(len(padded) - SHINGLE_SIZE + 1):
+                shingles.add(padded[i:i + SHINGLE_SIZE])
+    return shingles, tuple(sorted(negations)), tuple(sorted(numbers)), tuple(content)
+
+
+def minhash_signature(shingles: Set[str]) -> np.ndarray:
+    if not shingles:
+        return np.full(NUM_PERMUTATIONS, _PRIME, dtype=np.uint32)
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode('utf-8')) & _PRIME for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    return ((_HASH_A[:, None] * hashes[None, :] + _HASH_B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> np.ndarray:
+    """One 64-bit key per LSH band; claims sharing any key become candidates."""
+    bands = signature[:LSH_BANDS * LSH_ROWS].astype(np.uint64).reshape(LSH_BANDS, LSH_ROWS)
+    return (bands * _BAND_MIX).sum(axis=1) ^ _BAND_SALT
+
+
+def same_roles(a: tuple, b: tuple) -> bool:
+    """
+    Entity/role check on two claims' content words: one may add or drop words but
+    not swap one for another, and the words they share must come in the same order.
+    """
+    a_words, b_words = set(a), set(b)
+    if a_words - b_words and b_words - a_words:
+        return False
+    shared = a_words & b_words
+    return [w for w in dict.fromkeys(a) if w in shared] == [w for w in dict.fromkeys(b) if w in shared]
+
+
+class ClaimSignature:
+    """A claim's features and MinHash signature, computed once for repeated comparisons."""
+
+    def __init__(self, claim: str):
+        self.shingles, self.negations, self.numbers, self.content = claim_features(claim.lower().strip())
+        self.signature = minhash_signature(self.shingles) if self.shingles else None
+
+    def similarity(self, other: "ClaimSignature") -> float:
+        """Estimated Jaccard similarity; 0.0 if negation or numbers differ or same_roles fails."""
+        if (self.signature is None or other.signature is None or self.negations != other.negations
+                or self.numbers != other.numbers or not same_roles(self.content, other.content)):
+            return 0.0
+        return float(np.count_nonzero(self.signature == other.signature)) / NUM_PERMUTATIONS
+
+
+def claim_similarity(a: str, b: str) -> float:
+    """Estimated Jaccard similarity of two claims (0.0 if a guard says they are different claims)."""
+    return ClaimSignature(a).similarity(ClaimSignature(b))
+
+
+class ClaimIndex:
+    def __init__(self, threshold: float = 0.8, max_entries: int = 200000, ttl_seconds: Optional[float] = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # Ring buffer of entries: entry id N lives in slot N % max_entries
+        self._next_id = 0
+        self._entry_ids = np.full(max_entries, -1, dtype=np.int64)
+        self._signatures = np.zeros((max_entries, NUM_PERMUTATIONS), dtype=np.uint32)
+        self._added_at = np.zeros(max_entries, dtype=np.float64)
+        self._entries: List[Optional[tuple]] = [None] * max_entries  # (claim, tag, negations, numbers, content, payload)
+        self._by_claim: Dict[Tuple[str, str], int] = {}
+
+        # LSH tables: sorted band keys with the entry id each belongs to, plus recent unmerged keys
+        self._sorted_keys = np.empty(0, dtype=np.uint64)
+        self._sorted_ids = np.empty(0, dtype=np.int64)
+        self._pending: Dict[int, List[int]] = {}
+        self._pending_count = 0
+
+        self._counters = {"lookups": 0, "reuses": 0, "additions": 0, "evictions": 0}
+
+    def _is_live(self, entry_id: int) -> bool:
+        return self._entry_ids[entry_id % self.max_entries] == entry_id
+
+    def _merge_pending(self):
+        """Fold recent band keys into the sorted array and drop keys of evicted entries."""
+        live = self._entry_ids[self._sorted_ids % self.max_entries] == self._sorted_ids
+        keys, ids = self._sorted_keys[live], self._sorted_ids[live]
+
+        pending_keys = np.fromiter((k for k, v in self._pending.items() for _ in v), dtype=np.uint64, count=self._pending_count)
+        pending_ids = np.fromiter((i for v in self._pending.values() for i in v), dtype=np.int64, count=self._pending_count)
+        order = np.argsort(pending_keys, kind='stable')
+        pending_keys, pending_ids = pending_keys[order], pending_ids[order]
+
+        positions = np.searchsorted(keys, pending_keys)
+        self._sorted_keys = np.insert(keys, positions, pending_keys)
+        self._sorted_ids = np.insert(ids, positions, pending_ids)
+        self._pending = {}
+        self._pending_count = 0
+
+    def add(self, claim: str, payload: Any, tag: str = ""):
+        """
+        Index a verified claim. tag tells apart payloads of different kinds for the
+        same claim (lookup can ask for specific tags); re-adding the same claim
+        text with the same tag replaces its payload.
+        """
+        normalized = claim.lower().strip()
+        previous_id = self._by_claim.pop((normalized, tag), None)
+        if previous_id is not None and self._is_live(previous_id):
+            self._entry_ids[previous_id % self.max_entries] = -1
+
+        shingles, negations, numbers, content = claim_features(normalized)
+        if not shingles:
+            return
+        signature = minhash_signature(shingles)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        slot = entry_id % self.max_entries
+        evicted = self._entries[slot]
+        if evicted is not None and self._entry_ids[slot] >= 0:
+            self._by_claim.pop((evicted[0], evicted[1]), None)
+            self._counters["evictions"] += 1
+
+        self._entry_ids[slot] = entry_id
+        self._signatures[slot] = signature
+        self._added_at[slot] = time.time()
+        self._entries[slot] = (normalized, tag, negations, numbers, content, payload)
+        self._by_claim[(normalized, tag)] = entry_id
+        for key in band_keys(signature).tolist():
+            self._pending.setdefault(key, []).append(entry_id)
+        self._pending_count += LSH_BANDS
+        self._counters["additions"] += 1
+
+        if self._pending_count >= MERGE_EVERY * LSH_BANDS:
+            self._merge_pending()
+
+    def lookup(self, claim: str, tags: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns {"claim", "similarity", "payload"} for the most similar indexed
+        claim at or above the threshold that passes the negation, number and
+        role guards (only entries added with one of `tags`, if given), or None.
+        """
+        self._counters["lookups"] += 1
+        wanted = None if tags is None else set(tags)
+        shingles, negations, numbers, content = claim_features(claim.lower().strip())
+        if not shingles:
+            return None
+        signature = minhash_signature(shingles)
+        keys = band_keys(signature)
+
+        candidates = set()
+        starts = np.searchsorted(self._sorted_keys, keys, side='left')
+        ends = np.searchsorted(self._sorted_keys, keys, side='right')
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if end > start:
+                candidates.update(self._sorted_ids[start:end].tolist())
+        for key in keys.tolist():
+            candidates.update(self._pending.get(key, ()))
+
+        best = None
+        best_similarity = self.threshold
+        now = time.time()
+        for entry_id in candidates:
+            slot = entry_id % self.max_entries
+            if self._entry_ids[slot] != entry_id:
+                continue  # Evicted or replaced
+            if self.ttl_seconds is not None and now - self._added_at[slot] > self.ttl_seconds:
+                continue
+            stored_claim, stored_tag, stored_negations, stored_numbers, stored_content, payload = self._entries[slot]
+            if wanted is not None and stored_tag not in wanted:
+                continue
+            if (stored_negations != negations or stored_numbers != numbers
+                    or not same_roles(stored_content, content)):
+                continue
+            similarity = float(np.count_nonzero(self._signatures[slot] == signature)) / NUM_PERMUTATIONS
+            if similarity >= best_similarity:
+                best = {"claim": stored_claim, "similarity": round(similarity, 3), "payload": payload}
+                best_similarity = similarity
+
+        if best is not None:
+            self._counters["reuses"] += 1
+        return best
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._entry_ids >= 0))
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, "entries": len(self), "max_entries": self.max_entries, "threshold": self.threshold}
@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 from fastapi import FastAPI, HTTPException
@@ -9,6 +10,7 @@ from google import genai
 from pymongo import MongoClient
 from bson import ObjectId
 from dotenv import load_dotenv
+from claim_index import ClaimIndex
 
 # Load environment variables
 load_dotenv()
@@ -20,9 +22,13 @@ if not API_KEY:
 if not MONGODB_URI:
     raise ValueError("MONGODB_URI must be set")
 
-# Initialize Google GenAI
+# Initialize Google GenAI (calls go through ai.aio so they don't block the event loop)
 ai = genai.Client(api_key=API_KEY)
 
+# Limit on in-flight Gemini calls
+GEMINI_CONCURRENCY = int(os.getenv('GEMINI_CONCURRENCY', '8'))
+gemini_semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
+
 # Initialize MongoDB
 mongo_client = MongoClient(MONGODB_URI)
 db = mongo_client['test']
@@ -45,6 +51,13 @@ app.add_middleware(
 
 SEARCH_TOOLS = [{"google_search": {}}]
 
+# Near-duplicate index over verified headlines, so reworded copies of the same story reuse one verdict
+news_claim_index = ClaimIndex(
+    threshold=float(os.getenv('CLAIM_SIMILARITY_THRESHOLD', '0.8')),
+    max_entries=int(os.getenv('CLAIM_INDEX_MAX_ENTRIES', '200000')),
+    ttl_seconds=float(os.getenv('NEWS_VERDICT_REUSE_SECONDS', '86400'))
+)
+
 # ==================== ENHANCED AGENTS (DETAILED UI, NO NEWS CAP) ====================
 
 async def find_company_websites(company_name: str) -> Dict[str, Any]:
@@ -52,14 +65,15 @@ async def find_company_websites(company_name: str) -> Dict[str, Any]:
     try:
         print(f"Agent 1: Finding comprehensive web presence for '{company_name}'...")
 
-        response = ai.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=f"Find the official website, social media accounts, and investor relations page for company: {company_name}. Format: WEBSITE: [url] | SOCIAL: [twitter,linkedin,facebook] | INVESTOR: [url]",
-            config={
-                "tools": SEARCH_TOOLS,
-                "temperature": 0.1
-            }
-        )
+        async with gemini_semaphore:
+            response = await ai.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=f"Find the official website, social media accounts, and investor relations page for company: {company_name}. Format: WEBSITE: [url] | SOCIAL: [twitter,linkedin,facebook] | INVESTOR: [url]",
+                config={
+                    "tools": SEARCH_TOOLS,
+                    "temperature": 0.1
+                }
+            )
 
         text = response.text or ""
 
@@ -159,14 +173,15 @@ async def find_company_news(company_name: str, official_website: str = "", analy
 
         for i, query in enumerate(search_queries):
             try:
-                response = ai.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=query,
-                    config={
-                        "tools": SEARCH_TOOLS,
-                        "temperature": 0.2
-                    }
-                )
+                async with gemini_semaphore:
+                    response = await ai.aio.models.generate_content(
+                        model="gemini-2.5-flash",
+                        contents=query,
+                        config={
+                            "tools": SEARCH_TOOLS,
+                            "temperature": 0.2
+                        }
+                    )
 
                 # Collect grounding sources
                 if response.candidates and len(response.candidates) > 0:
@@ -276,14 +291,29 @@ async def verify_news_item(news_item: Dict[str, Any], company_name: str) -> Dict
         headline = news_item.get('title', '')
         source = news_item.get('source', '')
 
-        response = ai.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=f'Verify this news about {company_name}: "{headline}" from source "{source}". Check factual accuracy and provide: VERDICT: [REAL/FAKE/UNCERTAIN], CONFIDENCE: [0.0-1.0], BIAS: [low/medium/high], IMPACT: [low/medium/high]',
-            config={
-                "tools": SEARCH_TOOLS,
-                "temperature": 0.1
+        # Reuse the verdict of a near-identical headline about the same company
+        similar = news_claim_index.lookup(headline)
+        if similar and similar["payload"]["company"] == company_name:
+            print(f"Agent 3: Reusing verdict of similar headline (similarity {similar['similarity']})")
+            return {
+                **news_item,
+                "verification": {
+                    **similar["payload"]["verification"],
+                    "reused": True,
+                    "reused_from": similar["claim"],
+                    "similarity": similar["similarity"]
+                }
             }
-        )
+
+        async with gemini_semaphore:
+            response = await ai.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=f'Verify this news about {company_name}: "{headline}" from source "{source}". Check factual accuracy and provide: VERDICT: [REAL/FAKE/UNCERTAIN], CONFIDENCE: [0.0-1.0], BIAS: [low/medium/high], IMPACT: [low/medium/high]',
+                config={
+                    "tools": SEARCH_TOOLS,
+                    "temperature": 0.1
+                }
+            )
 
         text = response.text or ""
 
@@ -310,16 +340,19 @@ async def verify_news_item(news_item: Dict[str, Any], company_name: str) -> Dict
         if impact_match:
             impact = impact_match.group(1).lower()
 
+        verification = {
+            "verdict": verdict,
+            "confidence": confidence,
+            "bias_level": bias,
+            "impact_level": impact,
+            "reasoning": text.strip()[:300],
+            "verified_at": datetime.utcnow().isoformat()
+        }
+        news_claim_index.add(headline, {"company": company_name, "verification": verification})
+
         return {
             **news_item,
-            "verification": {
-                "verdict": verdict,
-                "confidence": confidence,
-                "bias_level": bias,
-                "impact_level": impact,
-                "reasoning": text.strip()[:300],
-                "verified_at": datetime.utcnow().isoformat()
-            }
+            "verification": verification
         }
     except Exception as e:
         print(f"Agent 3 Error: {e}")
@@ -382,7 +415,7 @@ async def analyze_company(company_id: str, analysis_period: str = "today", compe
                 "stats": {}
             }
 
-        # Step 3: Verify each news item (process in batches for efficiency)
+        # Step 3: Verify each news item (batches run concurrently, bounded by gemini_semaphore)
         verified_news = []
         batch_size = 10
 
@@ -390,9 +423,7 @@ async def analyze_company(company_id: str, analysis_period: str = "today", compe
             batch = news_items[i:i+batch_size]
             print(f"Verifying news batch {i//batch_size + 1}/{(len(news_items)//batch_size) + 1}")
 
-            for news in batch:
-                verification = await verify_news_item(news, company_name)
-                verified_news.append(verification)
+            verified_news.extend(await asyncio.gather(*[verify_news_item(news, company_name) for news in batch]))
 
         # Calculate comprehensive statistics
         total_news = len(verified_news)
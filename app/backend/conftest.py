@@ -0,0 +1,6 @@
+"""
+pytest setup for the backend: run `python -m pytest -q` from app/backend.
+test.py and test_snippet.py are manual scripts that call the live APIs, so they
+are not collected.
+"""
+collect_ignore = ["test.py", "test_snippet.py"]
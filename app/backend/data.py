@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
@@ -20,9 +21,13 @@ if not API_KEY:
 if not MONGODB_URI:
     raise ValueError("MONGODB_URI must be set")
 
-# Initialize Google GenAI
+# Initialize Google GenAI (calls go through ai.aio so they don't block the event loop)
 ai = genai.Client(api_key=API_KEY)
 
+# Limit on in-flight Gemini calls
+GEMINI_CONCURRENCY = int(os.getenv('GEMINI_CONCURRENCY', '8'))
+gemini_semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
+
 # Initialize MongoDB
 mongo_client = MongoClient(MONGODB_URI)
 db = mongo_client['test']
@@ -87,16 +92,17 @@ async def transcribe_audio(base64_audio: str, mime_type: str = "audio/webm") ->
         if not clean_mime:
             clean_mime = 'audio/webm'
         
-        response = ai.models.generate_content(
-            model="gemini-2.5-flash",
-            contents={
-                "parts": [
-                    {"inline_data": {"mime_type": clean_mime, "data": base64_audio}},
-                    {"text": "Listen to this audio. Output ONLY the verbatim spoken text. Do not reply to the speaker. If silence, output nothing."}
-                ]
-            },
-            config={"temperature": 0.0}
-        )
+        async with gemini_semaphore:
+            response = await ai.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents={
+                    "parts": [
+                        {"inline_data": {"mime_type": clean_mime, "data": base64_audio}},
+                        {"text": "Listen to this audio. Output ONLY the verbatim spoken text. Do not reply to the speaker. If silence, output nothing."}
+                    ]
+                },
+                config={"temperature": 0.0}
+            )
         
         return response.text or ""
     except Exception as error:
@@ -106,16 +112,17 @@ async def transcribe_audio(base64_audio: str, mime_type: str = "audio/webm") ->
 async def query_routing_agent(user_query: str, company_name: str) -> Dict[str, Any]:
     """AI agent to understand and route data queries"""
     try:
-        response = ai.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=f"User asks about {company_name}: '{user_query}'. Determine what data they want to query.",
-            config={
-                "system_instruction": f"You are a data query router for {company_name}'s news database. Route queries to appropriate data endpoints.",
-                "response_mime_type": "application/json",
-                "response_schema": query_agent_schema,
-                "temperature": 0.2
-            }
-        )
+        async with gemini_semaphore:
+            response = await ai.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=f"User asks about {company_name}: '{user_query}'. Determine what data they want to query.",
+                config={
+                    "system_instruction": f"You are a data query router for {company_name}'s news database. Route queries to appropriate data endpoints.",
+                    "response_mime_type": "application/json",
+                    "response_schema": query_agent_schema,
+                    "temperature": 0.2
+                }
+            )
         
         return json.loads(response.text or "{}")
     except Exception as error:
@@ -205,9 +212,10 @@ async def analyze_data_with_ai(user_query: str, data: Dict[str, Any], company_na
         
         data_context = json.dumps(data_summary, indent=2, default=str)[:4000]
         
-        response = ai.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=f"""You are a data analyst assistant for {company_name}. 
+        async with gemini_semaphore:
+            response = await ai.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=f"""You are a data analyst assistant for {company_name}. 
 
 USER QUESTION: {user_query}
 
@@ -224,8 +232,8 @@ Provide a clear, conversational answer based on the statistics. Include:
 - Be conversational but professional
 
 Format your response in markdown.""",
-            config={"temperature": 0.3}
-        )
+                config={"temperature": 0.3}
+            )
         
         return response.text or "I couldn't analyze the data."
     except Exception as error:
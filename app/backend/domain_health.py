@@ -0,0 +1,201 @@
+"""
+Health of the sites we fetch sources from.
+
+Failed fetches (timeouts, paywall 403s, connection errors) used to be
+returned but never remembered, so every check citing a dead or paywalled
+site waited out the full fetch timeout again. The registry keeps, per host,
+recent failure rate and latency percentiles, plus a circuit breaker:
+
+- closed: requests go through; HOST_BREAKER_FAILURES consecutive failures trip it
+- open: requests fail immediately with SourceUnavailable until the cooldown ends
+  (the cooldown doubles with each consecutive trip)
+- half-open: one probe request is let through; success closes the breaker,
+  failure opens it again
+
+Independently, each failed URL is negatively cached with exponential backoff,
+so a single paywalled article is skipped even when the rest of its site works.
+
+Hosts that are healthy and haven't been fetched for HOST_IDLE_SECONDS are
+forgotten, so the registry doesn't grow with every site ever cited.
+"""
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import aiohttp
+
+WINDOW = 50  # Outcomes (and latencies) kept per host
+MAX_BREAKER_COOLDOWN_SECONDS = 600
+MAX_URL_BACKOFF_SECONDS = 6 * 3600
+PROBE_TIMEOUT_SECONDS = 30  # A half-open probe that never reports back is replaced after this long
+HOST_IDLE_SECONDS = 600  # Forget healthy hosts not fetched for this long
+PRUNE_EVERY = 256
+
+
+class SourceUnavailable(aiohttp.ClientError):
+    """Raised without making a request when a host's breaker is open or a URL is backing off."""
+
+
+class HostHealth:
+    def __init__(self):
+        self.outcomes: Deque[bool] = deque(maxlen=WINDOW)
+        self.latencies: Deque[float] = deque(maxlen=WINDOW)
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.consecutive_trips = 0
+        self.open_until = 0.0
+        self.probe_started: Optional[float] = None
+        self.requests = 0
+        self.short_circuited = 0
+        self.last_error: Optional[str] = None
+        self.last_seen = time.monotonic()
+
+    def state(self, now: float) -> str:
+        if self.open_until == 0.0:
+            return "closed"
+        return "open" if now < self.open_until else "half_open"
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class DomainHealthRegistry:
+    def __init__(self, breaker_failures: int, breaker_cooldown_seconds: float,
+                 url_backoff_seconds: float, max_urls: int = 10000):
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown_seconds = breaker_cooldown_seconds
+        self.url_backoff_seconds = url_backoff_seconds
+        self.max_urls = max_urls
+        self._hosts: Dict[str, HostHealth] = {}
+        self._failed_urls: "OrderedDict[str, Tuple[int, float, str]]" = OrderedDict()  # uri -> (failures, retry_at, error)
+        self._checks = 0
+
+    def _host(self, uri: str) -> HostHealth:
+        host = (urlsplit(uri).hostname or '').lower()
+        health = self._hosts.get(host)
+        if health is None:
+            health = HostHealth()
+            self._hosts[host] = health
+        health.last_seen = time.monotonic()
+        return health
+
+    def check(self, uri: str) -> bool:
+        """
+        Raise SourceUnavailable if the URL is backing off or its host's breaker is open.
+        Returns True if this request is the half-open probe (see release_probe).
+        """
+        now = time.monotonic()
+        self._checks += 1
+        if self._checks % PRUNE_EVERY == 0:
+            self._prune(now)
+        failed = self._failed_urls.get(uri)
+        if failed and now < failed[1]:
+            raise SourceUnavailable(f"recently failed ({failed[2]}), retry in {round(failed[1] - now)}s")
+
+        health = self._host(uri)
+        state = health.state(now)
+        probing = health.probe_started is not None and now - health.probe_started < PROBE_TIMEOUT_SECONDS
+        if state == "open" or (state == "half_open" and probing):
+            health.short_circuited += 1
+            raise SourceUnavailable(f"{urlsplit(uri).hostname} is failing ({health.last_error}), skipped")
+        health.requests += 1
+        if state == "half_open":
+            health.probe_started = now  # This request is the probe
+            return True
+        return False
+
+    def release_probe(self, uri: str):
+        """
+        The probe request ended without an outcome (throttled, cancelled), so let the
+        next request probe instead of blocking the host for PROBE_TIMEOUT_SECONDS.
+        """
+        self._host(uri).probe_started = None
+
+    def _prune(self, now: float):
+        idle = [host for host, health in self._hosts.items()
+                if health.open_until == 0.0 and health.consecutive_failures == 0
+                and now - health.last_seen > HOST_IDLE_SECONDS]
+        for host in idle:
+            del self._hosts[host]
+
+    def _close(self, health: HostHealth):
+        health.consecutive_failures = 0
+        health.consecutive_trips = 0
+        health.open_until = 0.0
+        health.probe_started = None
+
+    def record_success(self, uri: str, latency: float):
+        health = self._host(uri)
+        health.outcomes.append(True)
+        health.latencies.append(latency)
+        self._close(health)
+        self._failed_urls.pop(uri, None)
+
+    def record_failure(self, uri: str, error: Exception, host_failure: bool = True):
+        """
+        Back off the URL. host_failure=False means the host answered fine but the
+        URL itself is unusable (404, a PDF...), so the breaker is not affected.
+        """
+        now = time.monotonic()
+        description = describe_error(error)
+
+        # Negative-cache the URL with exponential backoff
+        failures = self._failed_urls.pop(uri, (0, 0.0, ""))[0] + 1
+        backoff = min(MAX_URL_BACKOFF_SECONDS, self.url_backoff_seconds * 2 ** (failures - 1))
+        self._failed_urls[uri] = (failures, now + backoff, description)
+        while len(self._failed_urls) > self.max_urls:
+            self._failed_urls.popitem(last=False)
+
+        health = self._host(uri)
+        if not host_failure:
+            self._close(health)
+            return
+
+        health.outcomes.append(False)
+        health.consecutive_failures += 1
+        health.last_error = description
+        was_probe = health.probe_started is not None
+        health.probe_started = None
+        if was_probe or health.consecutive_failures >= self.breaker_failures:
+            health.trips += 1
+            health.consecutive_trips += 1
+            cooldown = min(MAX_BREAKER_COOLDOWN_SECONDS,
+                           self.breaker_cooldown_seconds * 2 ** (health.consecutive_trips - 1))
+            health.open_until = now + cooldown
+            health.consecutive_failures = 0
+            print(f"🚧 Circuit open for {urlsplit(uri).hostname} for {cooldown:g}s ({description})")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        hosts = {}
+        for host, health in sorted(self._hosts.items(), key=lambda item: item[1].requests, reverse=True)[:50]:
+            outcomes = len(health.outcomes)
+            hosts[host] = {
+                "state": health.state(now),
+                "requests": health.requests,
+                "failure_rate": round(health.outcomes.count(False) / outcomes, 3) if outcomes else 0.0,
+                "p50_ms": _ms(health.percentile(0.5)),
+                "p90_ms": _ms(health.percentile(0.9)),
+                "p99_ms": _ms(health.percentile(0.99)),
+                "trips": health.trips,
+                "short_circuited": health.short_circuited,
+                "retry_in_seconds": round(max(0.0, health.open_until - now), 1),
+                "last_error": health.last_error
+            }
+        backing_off = sum(1 for _, retry_at, _ in self._failed_urls.values() if retry_at > now)
+        return {"hosts": hosts, "failed_urls": len(self._failed_urls), "urls_backing_off": backing_off}
+
+
+def describe_error(error: Exception) -> str:
+    if isinstance(error, aiohttp.ClientResponseError):
+        return f"HTTP {error.status}"
+    if isinstance(error, TimeoutError):
+        return "timeout"
+    return type(error).__name__
+
+
+def _ms(seconds: Optional[float]) -> Optional[int]:
+    return round(seconds * 1000) if seconds is not None else None
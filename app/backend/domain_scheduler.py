@@ -0,0 +1,144 @@
+"""
+Per-host politeness for source fetching.
+
+The old global sleep between snippet fetches slowed five requests to five
+different news sites exactly as much as five requests to one site. Each host
+now has its own token bucket: requests to different hosts go out in parallel,
+while requests to the same host are spaced to rate_per_second (after an
+initial burst). Optionally the host's robots.txt Crawl-delay is honoured,
+which can only make the spacing larger.
+
+Waits are reserved up front (the bucket may go negative), so concurrent
+requests to one host queue in arrival order. A request that would have to
+wait longer than max_wait_seconds fails fast with HostThrottled instead.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlsplit
+import aiohttp
+
+HOST_IDLE_SECONDS = 600  # Forget hosts not fetched for this long
+PRUNE_EVERY = 256
+
+
+class HostThrottled(aiohttp.ClientError):
+    """Raised when a host's queue is longer than the caller is willing to wait."""
+
+
+class HostBucket:
+    def __init__(self, rate_per_second: float, burst: float):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.tokens = burst
+        self.refilled_at = time.monotonic()
+        self.crawl_delay: Optional[float] = None
+        self.robots_loaded = False
+        self.requests = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+
+    def set_crawl_delay(self, delay: Optional[float]):
+        self.crawl_delay = delay
+        if delay:
+            # Crawl-delay means one request per delay seconds, no burst
+            self.rate = min(self.rate, 1.0 / delay)
+            self.burst = 1.0
+            self.tokens = min(self.tokens, 1.0)
+
+    def reserve(self, now: float) -> float:
+        """Take one token and return how long the caller must wait for it."""
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def wait_time(self, now: float) -> float:
+        tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+
+class DomainScheduler:
+    def __init__(self, rate_per_second: float, burst: float, max_wait_seconds: float,
+                 robots_loader: Optional[Callable[[str], Awaitable[Optional[float]]]] = None):
+        """robots_loader(origin) returns the origin's robots.txt Crawl-delay (None = no robots check)."""
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_wait_seconds = max_wait_seconds
+        self.robots_loader = robots_loader
+        self._hosts: Dict[str, HostBucket] = {}
+        self._robots_tasks: Dict[str, asyncio.Task] = {}
+        self._acquired = 0
+        self.throttled = 0
+
+    def _bucket(self, host: str) -> HostBucket:
+        bucket = self._hosts.get(host)
+        if bucket is None:
+            bucket = HostBucket(self.rate_per_second, self.burst)
+            self._hosts[host] = bucket
+        return bucket
+
+    async def _load_robots(self, origin: str, bucket: HostBucket):
+        # One robots.txt fetch per host, shared by concurrent first requests
+        task = self._robots_tasks.get(origin)
+        if task is None:
+            task = asyncio.create_task(self.robots_loader(origin))
+            self._robots_tasks[origin] = task
+        try:
+            delay = await asyncio.shield(task)
+        except Exception:
+            delay = None
+        finally:
+            self._robots_tasks.pop(origin, None)
+        if not bucket.robots_loaded:
+            bucket.robots_loaded = True
+            bucket.set_crawl_delay(delay)
+            if delay:
+                print(f"🐢 {urlsplit(origin).hostname} asks for a {delay:g}s crawl delay")
+
+    async def acquire(self, uri: str):
+        """Wait for the host's turn. Raises HostThrottled if that is more than max_wait_seconds away."""
+        parts = urlsplit(uri)
+        host = (parts.hostname or '').lower()
+        bucket = self._bucket(host)
+
+        if self.robots_loader and not bucket.robots_loaded:
+            await self._load_robots(f"{parts.scheme}://{parts.netloc}", bucket)
+
+        now = time.monotonic()
+        if bucket.wait_time(now) > self.max_wait_seconds:
+            self.throttled += 1
+            raise HostThrottled(f"{host} is rate limited, try again later")
+        wait = bucket.reserve(now)
+        bucket.requests += 1
+        if wait > 0:
+            bucket.delayed += 1
+            bucket.total_wait += wait
+            await asyncio.sleep(wait)
+
+        self._acquired += 1
+        if self._acquired % PRUNE_EVERY == 0:
+            self._prune(time.monotonic())
+
+    def _prune(self, now: float):
+        idle = [host for host, bucket in self._hosts.items() if now - bucket.refilled_at > HOST_IDLE_SECONDS]
+        for host in idle:
+            del self._hosts[host]
+
+    def stats(self) -> Dict[str, Any]:
+        busiest = sorted(self._hosts.items(), key=lambda item: item[1].requests, reverse=True)[:20]
+        return {
+            "hosts": len(self._hosts),
+            "rate_per_second": self.rate_per_second,
+            "burst": self.burst,
+            "throttled": self.throttled,
+            "busiest_hosts": {
+                host: {
+                    "requests": bucket.requests,
+                    "delayed": bucket.delayed,
+                    "avg_wait_ms": round(bucket.total_wait / bucket.requests * 1000) if bucket.requests else 0,
+                    "crawl_delay": bucket.crawl_delay
+                }
+                for host, bucket in busiest
+            }
+        }
@@ -0,0 +1,62 @@
+"""
+Long-lived Gemini clients, one per API key.
+
+Building a genai.Client per call throws away its HTTP connection pool, so every
+call paid for a fresh TCP + TLS handshake. The registry creates each client
+lazily on first use and keeps it for the life of the process, so calls on the
+same key reuse warm connections. It also keeps per-key call/latency metrics.
+"""
+import time
+from typing import Any, Dict
+from google import genai
+
+
+class GenAIClientRegistry:
+    def __init__(self):
+        self._clients: Dict[str, genai.Client] = {}
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, api_key: str) -> genai.Client:
+        client = self._clients.get(api_key)
+        if client is None:
+            client = genai.Client(api_key=api_key)
+            self._clients[api_key] = client
+            self._metrics[api_key] = {"calls": 0, "errors": 0, "total_latency": 0.0, "max_latency": 0.0, "created_at": time.time()}
+            print(f"🔌 Created Gemini client for key {api_key[:6]}... ({len(self._clients)} pooled)")
+        return client
+
+    async def generate_content(self, api_key: str, **request) -> Any:
+        """client.aio.models.generate_content on the pooled client for api_key, with timing."""
+        client = self.get(api_key)
+        metrics = self._metrics[api_key]
+        started = time.time()
+        try:
+            return await client.aio.models.generate_content(**request)
+        except Exception:
+            metrics["errors"] += 1
+            raise
+        finally:
+            latency = time.time() - started
+            metrics["calls"] += 1
+            metrics["total_latency"] += latency
+            metrics["max_latency"] = max(metrics["max_latency"], latency)
+
+    def stats(self) -> Dict[str, Any]:
+        result = {}
+        for api_key, metrics in self._metrics.items():
+            result[f"{api_key[:6]}..."] = {
+                "calls": metrics["calls"],
+                "errors": metrics["errors"],
+                "avg_latency_ms": round(metrics["total_latency"] / metrics["calls"] * 1000) if metrics["calls"] else 0,
+                "max_latency_ms": round(metrics["max_latency"] * 1000),
+                "client_age_seconds": round(time.time() - metrics["created_at"])
+            }
+        return result
+
+    async def close(self):
+        for client in self._clients.values():
+            try:
+                await client.aio.aclose()
+            except Exception as e:
+                print(f"Gemini client close error: {e}")
+        self._clients.clear()
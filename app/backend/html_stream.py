@@ -0,0 +1,158 @@
+"""
+Incremental HTML-to-sentences extraction.
+
+HTML is fed in chunks as it arrives from the network into lxml's parser in
+target (SAX-style) mode, so no tree is ever built. Text inside
+script/style/nav/footer/header is dropped as it is parsed, and complete
+sentences are handed back as soon as they are available. Once max_length
+characters of text have been produced the stream reports itself full, so the
+caller can stop reading the body: CPU and memory per page stay bounded no
+matter how large the page is.
+
+When the HTTP response names no charset, the encoding is sniffed from the
+first SNIFF_BYTES of the body the way browsers do (BOM, then <meta charset>,
+then whether the bytes are valid UTF-8), so legacy windows-1252 pages keep
+their accented characters and quotes stay verbatim.
+"""
+import codecs
+import re
+from typing import Iterator, List, Optional
+from lxml import etree
+
+SKIPPED_TAGS = {"script", "style", "nav", "footer", "header"}
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+WHITESPACE = re.compile(r'\s+')
+SNIFF_BYTES = 1024
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+BOMS = ((codecs.BOM_UTF8, 'utf-8'), (codecs.BOM_UTF16_LE, 'utf-16-le'), (codecs.BOM_UTF16_BE, 'utf-16-be'))
+# Per the HTML spec, pages labelled latin-1/ascii are decoded as windows-1252
+LEGACY_ALIASES = {'iso8859-1': 'windows-1252', 'ascii': 'windows-1252'}
+
+
+def sniff_encoding(head: bytes) -> str:
+    """Encoding of an HTML document without an HTTP charset, judged from its first bytes."""
+    for bom, name in BOMS:
+        if head.startswith(bom):
+            return name
+    match = META_CHARSET.search(head)
+    if match:
+        try:
+            name = codecs.lookup(match.group(1).decode('ascii')).name
+        except (LookupError, UnicodeDecodeError):
+            name = None
+        if name:
+            return 'utf-8' if name.startswith('utf-16') else LEGACY_ALIASES.get(name, name)  # A meta tag readable as ASCII can't be UTF-16
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is still UTF-8
+        if e.start < len(head) - 3:
+            return 'windows-1252'
+    return 'utf-8'
+
+
+class _TextTarget:
+    """lxml parser target that keeps only visible text, with a space at every tag boundary."""
+
+    def __init__(self):
+        self.skip_depth = 0
+        self.parts: List[str] = []
+
+    def start(self, tag, attrib):
+        if self.skip_depth or tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        else:
+            self.parts.append(' ')
+
+    def end(self, tag):
+        if self.skip_depth:
+            self.skip_depth -= 1
+        else:
+            self.parts.append(' ')
+
+    def data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return None
+
+
+class SentenceStream:
+    def __init__(self, max_length: int = 10000, encoding: Optional[str] = None):
+        self.max_length = max_length
+        self._target = _TextTarget()
+        self._parser = None
+        self._head = bytearray()  # Body prefix held back until the encoding is known
+        if encoding:
+            self._start_parser(encoding)
+        self.encoding = encoding
+        self._buffer = ''
+        self._emitted = 0
+        self.bytes_fed = 0
+
+    def _start_parser(self, encoding: str):
+        try:
+            self._parser = etree.HTMLParser(target=self._target, encoding=encoding)
+        except LookupError:
+            self._parser = etree.HTMLParser(target=self._target, encoding='utf-8')
+        self.encoding = encoding
+
+    def _feed_head(self):
+        self._start_parser(sniff_encoding(bytes(self._head)))
+        self._parser.feed(bytes(self._head))
+        self._head.clear()
+
+    @property
+    def full(self) -> bool:
+        """True once max_length characters of text have been collected."""
+        return self._emitted + len(self._buffer) >= self.max_length
+
+    def _drain(self, final: bool) -> Iterator[str]:
+        if self._target.parts:
+            self._buffer += ''.join(self._target.parts)
+            self._target.parts.clear()
+            self._buffer = WHITESPACE.sub(' ', self._buffer).lstrip()
+
+        # Same limit as the non-streaming path: only the first max_length characters count
+        room = self.max_length - self._emitted
+        if len(self._buffer) >= room:
+            self._buffer = self._buffer[:room]
+            final = True
+
+        pieces = SENTENCE_BOUNDARY.split(self._buffer)
+        complete, self._buffer = (pieces, '') if final else (pieces[:-1], pieces[-1])
+        for sentence in complete:
+            sentence = sentence.strip()
+            if sentence:
+                self._emitted += len(sentence) + 1
+                yield sentence
+
+    def feed(self, chunk: bytes) -> Iterator[str]:
+        """Parse another chunk of HTML and yield any sentences it completed."""
+        if self.full:
+            return
+        self.bytes_fed += len(chunk)
+        if self._parser is None:
+            self._head += chunk
+            if len(self._head) < SNIFF_BYTES:
+                return
+            self._feed_head()
+        else:
+            self._parser.feed(chunk)
+        yield from self._drain(final=False)
+
+    def close(self) -> Iterator[str]:
+        """Flush the parser and yield the remaining text as sentences."""
+        if self._parser is None:
+            if not self._head:
+                return
+            self._feed_head()
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            pass  # Empty or truncated document, keep whatever text we have
+        yield from self._drain(final=True)
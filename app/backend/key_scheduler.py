@@ -0,0 +1,178 @@
+"""
+Quota-aware scheduler for the Google API key pool.
+
+Each key gets a token bucket for its per-minute limit, a daily request
+counter, a cooldown after RESOURCE_EXHAUSTED (doubling on repeated 429s) and
+a health score (EWMA of successful calls). acquire() hands out the healthiest
+key that still has budget and consumes one request from it, so exhausted or
+cooling keys are skipped without spending a request on them. Selection never
+awaits while holding state, so it is safe under concurrent asyncio tasks.
+"""
+import time
+import asyncio
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+# Gemini free-tier daily quotas reset at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+HEALTH_SMOOTHING = 0.2  # Weight of the latest outcome in the health score
+MAX_COOLDOWN_SECONDS = 3600
+
+
+def quota_day() -> str:
+    return datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+
+class KeyState:
+    def __init__(self, key: str, index: int, rpm_limit: int, rpd_limit: int):
+        self.key = key
+        self.index = index
+        self.rpm_limit = rpm_limit
+        self.rpd_limit = rpd_limit
+        self.tokens = float(rpm_limit)
+        self.refilled_at = time.monotonic()
+        self.day = quota_day()
+        self.used_today = 0
+        self.cooldown_until = 0.0
+        self.consecutive_rate_limits = 0
+        self.health = 1.0
+        self.last_used = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.rate_limits = 0
+        self.avg_latency = 0.0
+
+    def refresh(self, now: float):
+        self.tokens = min(float(self.rpm_limit), self.tokens + (now - self.refilled_at) * self.rpm_limit / 60.0)
+        self.refilled_at = now
+        today = quota_day()
+        if today != self.day:
+            self.day = today
+            self.used_today = 0
+
+    def wait_time(self, now: float) -> Optional[float]:
+        """Seconds until this key can serve a request, or None if it is out for the day."""
+        if self.used_today >= self.rpd_limit:
+            return None
+        wait = max(0.0, self.cooldown_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) * 60.0 / self.rpm_limit)
+        return wait
+
+
+class KeyScheduler:
+    def __init__(self, keys: List[str], rpm_limit: int, rpd_limit: int, cooldown_seconds: float = 60.0):
+        self.cooldown_seconds = cooldown_seconds
+        self._states = [KeyState(key, i, rpm_limit, rpd_limit) for i, key in enumerate(keys)]
+        self._by_key = {state.key: state for state in self._states}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def usable_keys(self) -> int:
+        """Keys with daily budget left and not cooling down after a 429."""
+        with self._lock:
+            now = time.monotonic()
+            count = 0
+            for state in self._states:
+                state.refresh(now)
+                if state.used_today < state.rpd_limit and state.cooldown_until <= now:
+                    count += 1
+            return count
+
+    def remaining_today(self) -> int:
+        """Requests left in today's budget across keys not cooling down after a 429."""
+        with self._lock:
+            now = time.monotonic()
+            remaining = 0
+            for state in self._states:
+                state.refresh(now)
+                if state.cooldown_until <= now:
+                    remaining += max(0, state.rpd_limit - state.used_today)
+            return remaining
+
+    def try_acquire(self) -> Optional[str]:
+        """Consume one request from the best available key, or return None if none can serve now."""
+        with self._lock:
+            now = time.monotonic()
+            ready = []
+            for state in self._states:
+                state.refresh(now)
+                if state.wait_time(now) == 0:
+                    ready.append(state)
+            if not ready:
+                return None
+
+            # Healthiest first, then the one idle longest (keeps load spread like round-robin)
+            state = max(ready, key=lambda s: (round(s.health, 1), -s.last_used))
+            state.tokens -= 1
+            state.used_today += 1
+            state.last_used = now
+            print(f"🔑 Using Google API key #{state.index + 1}/{len(self._states)} "
+                  f"({state.rpd_limit - state.used_today} left today)")
+            return state.key
+
+    async def acquire(self, max_wait: float = 0.0) -> Optional[str]:
+        """
+        Like try_acquire, but waits up to max_wait seconds for a per-minute
+        token or cooldown to free up. Returns None if every key is exhausted.
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            key = self.try_acquire()
+            if key is not None:
+                return key
+            with self._lock:
+                now = time.monotonic()
+                waits = [w for w in (s.wait_time(now) for s in self._states) if w is not None]
+            if not waits or now + min(waits) > deadline:
+                return None
+            await asyncio.sleep(min(waits))
+
+    def report_success(self, key: str, latency: float):
+        with self._lock:
+            state = self._by_key[key]
+            state.successes += 1
+            state.consecutive_rate_limits = 0
+            state.health = (1 - HEALTH_SMOOTHING) * state.health + HEALTH_SMOOTHING
+            state.avg_latency = latency if state.successes == 1 else 0.8 * state.avg_latency + 0.2 * latency
+
+    def report_rate_limited(self, key: str, error_message: str = ""):
+        """Cool the key down after a 429; a daily-quota error takes it out until the quota resets."""
+        with self._lock:
+            state = self._by_key[key]
+            state.rate_limits += 1
+            state.consecutive_rate_limits += 1
+            state.health = (1 - HEALTH_SMOOTHING) * state.health
+            if "PerDay" in error_message or "per day" in error_message.lower():
+                state.used_today = state.rpd_limit
+            cooldown = min(MAX_COOLDOWN_SECONDS, self.cooldown_seconds * 2 ** (state.consecutive_rate_limits - 1))
+            state.cooldown_until = time.monotonic() + cooldown
+
+    def report_error(self, key: str):
+        with self._lock:
+            state = self._by_key[key]
+            state.failures += 1
+            state.health = (1 - HEALTH_SMOOTHING) * state.health
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            now = time.monotonic()
+            result = []
+            for state in self._states:
+                state.refresh(now)
+                result.append({
+                    "key": f"#{state.index + 1} ({state.key[:6]}...)",
+                    "minute_tokens": round(state.tokens, 2),
+                    "remaining_today": max(0, state.rpd_limit - state.used_today),
+                    "cooldown_seconds": round(max(0.0, state.cooldown_until - now), 1),
+                    "health": round(state.health, 3),
+                    "successes": state.successes,
+                    "failures": state.failures,
+                    "rate_limits": state.rate_limits,
+                    "avg_latency_ms": round(state.avg_latency * 1000)
+                })
+            return result
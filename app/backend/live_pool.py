@@ -0,0 +1,206 @@
+"""
+Pre-warmed Gemini Live upstream connections.
+
+Every /ws/live-session used to open its own BidiGenerateContent websocket and
+send the setup message, so time-to-first-audio included DNS, TLS, the
+websocket handshake and model setup. LiveConnectionPool keeps up to `size`
+connections that have already completed setup (setupComplete received) and
+hands one to each new session, replacing it in the background.
+
+Idle connections are dropped after max_idle_seconds (Gemini Live sessions
+have a limited lifetime, and a stale socket is worse than a fresh one), and
+any connection the server has closed is skipped. The pool only warms while
+voice is in use: the first session after startup (or after active_seconds
+without one) connects on its own and starts the refill, so an idle server
+holds no upstream sessions. When the pool is empty or disabled (size 0), a
+session opens its own connection as before. Connect
+(handshake) and setup (setup -> setupComplete) latency are recorded
+separately.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+import websockets
+
+SETUP_TIMEOUT_SECONDS = 10
+MAINTAIN_EVERY_SECONDS = 5
+MAX_RETRY_SECONDS = 60  # Backoff cap after failed warm-ups (bad key, upstream outage)
+LATENCY_WINDOW = 200
+
+
+class WarmConnection:
+    def __init__(self, ws: Any, connect_seconds: float, setup_seconds: float):
+        self.ws = ws
+        self.ready_at = time.monotonic()
+        self.connect_seconds = connect_seconds
+        self.setup_seconds = setup_seconds
+
+
+class LiveConnectionPool:
+    def __init__(self, url: str, setup_message: Dict[str, Any], size: int, max_idle_seconds: float,
+                 active_seconds: float):
+        self.url = url
+        self.setup_message = json.dumps(setup_message)
+        self.size = size
+        self.max_idle_seconds = max_idle_seconds
+        self.active_seconds = active_seconds
+        self._last_session = -math.inf
+        self._idle: Deque[WarmConnection] = deque()
+        self._opening = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._maintainer: Optional[asyncio.Task] = None
+        self._closed = False
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self.connect_latency: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.setup_latency: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.failures = 0
+
+    async def open(self) -> WarmConnection:
+        """Connect and complete model setup."""
+        started = time.monotonic()
+        ws = await websockets.connect(self.url)
+        connected = time.monotonic()
+        try:
+            await ws.send(self.setup_message)
+            await asyncio.wait_for(self._await_setup(ws), SETUP_TIMEOUT_SECONDS)
+        except BaseException:
+            await ws.close()
+            raise
+        conn = WarmConnection(ws, connected - started, time.monotonic() - connected)
+        self.connect_latency.append(conn.connect_seconds)
+        self.setup_latency.append(conn.setup_seconds)
+        return conn
+
+    @staticmethod
+    async def _await_setup(ws: Any):
+        while True:
+            if "setupComplete" in json.loads(await ws.recv()):
+                return
+
+    def _usable(self, conn: WarmConnection, now: float) -> bool:
+        return now - conn.ready_at < self.max_idle_seconds and conn.ws.close_code is None
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _discard(self, conn: WarmConnection):
+        self.expired += 1
+        self._spawn(conn.ws.close())
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[Any]:
+        """An upstream websocket that has finished setup; closed when the session ends."""
+        now = time.monotonic()
+        self._last_session = now
+        conn = None
+        while self._idle:
+            candidate = self._idle.popleft()
+            if self._usable(candidate, now):
+                conn = candidate
+                break
+            self._discard(candidate)
+
+        if conn is not None:
+            self.hits += 1
+            print(f"🎤 Using pre-warmed Gemini Live connection (idle {now - conn.ready_at:.0f}s)")
+        else:
+            self.misses += 1
+        self._refill()
+        if conn is None:
+            conn = await self.open()
+            print(f"🎤 Connected to Gemini Live API (connect {conn.connect_seconds * 1000:.0f}ms, "
+                  f"setup {conn.setup_seconds * 1000:.0f}ms)")
+        try:
+            yield conn.ws
+        finally:
+            await conn.ws.close()
+
+    def _active(self) -> bool:
+        return time.monotonic() - self._last_session < self.active_seconds
+
+    def _refill(self):
+        if self._closed or self.size <= 0 or not self._active() or time.monotonic() < self._retry_at:
+            return
+        for _ in range(self.size - len(self._idle) - self._opening):
+            self._opening += 1
+            self._spawn(self._warm_one())
+
+    async def _warm_one(self):
+        try:
+            conn = await self.open()
+        except Exception as e:
+            self.failures += 1
+            self._consecutive_failures += 1
+            backoff = min(MAX_RETRY_SECONDS, 2 ** self._consecutive_failures)
+            self._retry_at = time.monotonic() + backoff
+            print(f"⚠️ Gemini Live warm-up failed ({type(e).__name__}: {e}), retrying in {backoff}s")
+            return
+        finally:
+            self._opening -= 1
+        self._consecutive_failures = 0
+        if self._closed:
+            await conn.ws.close()
+        else:
+            self._idle.append(conn)
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(MAINTAIN_EVERY_SECONDS)
+            now = time.monotonic()
+            for conn in [c for c in self._idle if not self._usable(c, now)]:
+                self._idle.remove(conn)
+                self._discard(conn)
+            self._refill()
+
+    async def start(self):
+        if self.size <= 0:
+            return
+        self._maintainer = asyncio.create_task(self._maintain())
+        print(f"🎤 Gemini Live pool: up to {self.size} warm connection(s) while sessions are active")
+
+    async def close(self):
+        self._closed = True
+        if self._maintainer is not None:
+            self._maintainer.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        while self._idle:
+            await self._idle.popleft().ws.close()
+
+    def stats(self) -> Dict[str, Any]:
+        sessions = self.hits + self.misses
+        return {
+            "size": self.size,
+            "active": self._active(),
+            "idle": len(self._idle),
+            "opening": self._opening,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / sessions, 3) if sessions else 0.0,
+            "expired": self.expired,
+            "warm_up_failures": self.failures,
+            "connect_ms": _percentiles(list(self.connect_latency)),
+            "setup_ms": _percentiles(list(self.setup_latency))
+        }
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Optional[int]]:
+    ordered = sorted(samples)
+
+    def pick(fraction: float) -> Optional[int]:
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000)
+
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99)}
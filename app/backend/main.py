@@ -2,18 +2,32 @@ import os
 import json
 import random
 import asyncio
-from typing import Dict, List, Any, Optional
+import time
+import copy
+import base64
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, List, Any, Optional, Set, Tuple
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from google import genai  # Keep for voice/audio only
 from google.genai import types
 from dotenv import load_dotenv
 import websockets
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
 import re
-from groq import Groq  # For text-based agents
+from groq import AsyncGroq  # For text-based agents
+from source_fetcher import fetch_page_if_modified, open_page, iter_body, page_validators, close_session, domain_scheduler, domain_health  # Shared async HTTP pool for source pages
+from html_stream import SentenceStream
+from sentence_ranker import prepare_query, rank_sentences
+from parse_pool import ParsePool, parse_page_sentences, stream_parse_sentences
+from cache_store import CacheStore
+from claim_index import ClaimIndex, ClaimSignature, claim_similarity
+from key_scheduler import KeyScheduler
+from genai_clients import GenAIClientRegistry
+from live_pool import LiveConnectionPool
+from voice_audio import AudioCoalescer, VoiceActivityDetector, VoiceStats, AUDIO_STREAM_END_MESSAGE, pcm_bytes, realtime_input_message
 
 # Load environment variables from .env file
 load_dotenv()
@@ -50,16 +64,24 @@ GOOGLE_API_KEYS = [
 ]
 GOOGLE_API_KEYS = [key for key in GOOGLE_API_KEYS if key]
 
-# Track current Google API key index for rotation
-google_key_index = 0
+class GoogleKeysExhaustedError(Exception):
+    """Raised when every key in GOOGLE_API_KEYS has hit its quota."""
 
-def get_next_google_key():
-    """Round-robin rotation for Google API keys (Check Agent only)"""
-    global google_key_index
-    key = GOOGLE_API_KEYS[google_key_index]
-    google_key_index = (google_key_index + 1) % len(GOOGLE_API_KEYS)
-    print(f"🔑 Using Google API key #{google_key_index + 1}/{len(GOOGLE_API_KEYS)} for Check Agent")
-    return key
+# Quota-aware scheduler shared by the Check Agent and the snippet fallback
+# (per-key RPM token bucket, daily budget, cooldown after 429, health scoring)
+google_keys = KeyScheduler(
+    GOOGLE_API_KEYS,
+    rpm_limit=int(os.getenv('GOOGLE_KEY_RPM', '5')),
+    rpd_limit=int(os.getenv('GOOGLE_KEY_RPD', '20')),
+    cooldown_seconds=float(os.getenv('GOOGLE_KEY_COOLDOWN_SECONDS', '60'))
+)
+GOOGLE_KEY_MAX_WAIT_SECONDS = float(os.getenv('GOOGLE_KEY_MAX_WAIT_SECONDS', '2'))  # Wait this long for a per-minute token before giving up
+
+def is_quota_error(error: Exception) -> bool:
+    """True for 429 / RESOURCE_EXHAUSTED / quota errors, including an exhausted key pool."""
+    error_msg = str(error)
+    return (isinstance(error, GoogleKeysExhaustedError) or "429" in error_msg
+            or "RESOURCE_EXHAUSTED" in error_msg or "quota" in error_msg.lower())
 
 # Track current key index for round-robin rotation (COMMENTED - not needed for Groq)
 # current_key_index = 0
@@ -71,19 +93,120 @@ def get_next_google_key():
 #     print(f"🔑 Using API key #{current_key_index + 1}/{len(API_KEYS)}")
 #     return key
 
-# In-memory snippet cache to avoid refetching same URLs
-snippet_cache = {}
+# Snippet cache to avoid refetching same URLs (bounded LRU + TTL, optional SQLite tier)
+snippet_cache = CacheStore(
+    "snippets",
+    max_bytes=int(os.getenv('SNIPPET_CACHE_MAX_BYTES', str(32 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv('SNIPPET_CACHE_TTL_SECONDS', '86400')),
+    negative_ttl_seconds=float(os.getenv('SNIPPET_CACHE_NEGATIVE_TTL_SECONDS', '1800')),
+    disk_path=os.getenv('SNIPPET_CACHE_DB') or None  # e.g. /tmp/genesis_cache.db, shared by workers on one host
+)
+
+# Streaming ingestion: parse pages incrementally as they download and stop at the text budget
+STREAMING_INGESTION = os.getenv('STREAMING_INGESTION', 'true').lower() == 'true'
+
+# Worker processes for HTML parsing and sentence ranking (0 = parse on the event loop)
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', str(os.cpu_count() or 1)))
+PARSE_BYTES_PER_CHAR = int(os.getenv('PARSE_BYTES_PER_CHAR', '32'))  # HTML read per character of text budget before parsing on a worker
+parse_pool = ParsePool(
+    workers=PARSE_WORKERS,
+    max_pending=int(os.getenv('PARSE_QUEUE_LIMIT', str(PARSE_WORKERS * 4)))  # beyond this, parse in-process
+)
+
+# Page cache: cleaned, sentence-split documents per URI, shared by every claim citing the page
+PAGE_CACHE_FRESH_SECONDS = float(os.getenv('PAGE_CACHE_FRESH_SECONDS', '900'))  # Served without revalidation for this long
+page_cache = CacheStore(
+    "pages",
+    max_bytes=int(os.getenv('PAGE_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv('PAGE_CACHE_TTL_SECONDS', '86400')),
+    negative_ttl_seconds=0,
+    disk_path=os.getenv('SNIPPET_CACHE_DB') or None
+)
+
+# Verdict cache for run_check_agent, keyed on the normalized claim
+VERDICT_CACHE_TTL_SECONDS = float(os.getenv('VERDICT_CACHE_TTL_SECONDS', '3600'))  # Fresh verdicts are reused for this long
+verdict_cache = CacheStore(
+    "verdicts",
+    max_bytes=int(os.getenv('VERDICT_CACHE_MAX_BYTES', str(16 * 1024 * 1024))),
+    # Kept past the fresh TTL so a stale verdict can be served when every key is exhausted
+    ttl_seconds=float(os.getenv('VERDICT_CACHE_STALE_SECONDS', '604800')),
+    negative_ttl_seconds=0,
+    disk_path=os.getenv('SNIPPET_CACHE_DB') or None
+)
+
+# Near-duplicate index over verified claims; maps paraphrases to an existing verdict_cache key
+claim_index = ClaimIndex(
+    threshold=float(os.getenv('CLAIM_SIMILARITY_THRESHOLD', '0.8')),
+    max_entries=int(os.getenv('CLAIM_INDEX_MAX_ENTRIES', '200000')),
+    ttl_seconds=VERDICT_CACHE_TTL_SECONDS
+)
+
+# Checks currently running upstream, so concurrent identical claims share one call,
+# and how many callers are waiting on each (the last one to leave cancels it)
+inflight_checks: Dict[str, asyncio.Task] = {}
+check_waiters: Dict[asyncio.Task, int] = {}
 
 # Feature flags
 ENABLE_SNIPPET_EXTRACTION = os.getenv('ENABLE_SNIPPET_EXTRACTION', 'true').lower() == 'true'
-SNIPPET_DELAY_SECONDS = float(os.getenv('SNIPPET_DELAY_SECONDS', '0.5'))  # Delay between snippet requests
 MAX_SNIPPETS = int(os.getenv('MAX_SNIPPETS', '5'))  # Max number of snippets to extract
+CONCURRENT_SNIPPETS = os.getenv('CONCURRENT_SNIPPETS', 'true').lower() == 'true'  # Fan out across sources instead of one at a time
+SNIPPET_CONCURRENCY = int(os.getenv('SNIPPET_CONCURRENCY', '3'))  # Max sources fetched at once in concurrent mode
+SNIPPET_DEADLINE_SECONDS = float(os.getenv('SNIPPET_DEADLINE_SECONDS', '8'))  # Overall time budget for concurrent extraction
+BATCH_MAX_CLAIMS = int(os.getenv('BATCH_MAX_CLAIMS', '50'))  # Claims accepted by /api/check-agent/batch
+BATCH_CHECK_CONCURRENCY = int(os.getenv('BATCH_CHECK_CONCURRENCY', '4'))  # Upper bound; also limited to usable Google keys
+SCAN_MAX_PARALLEL = int(os.getenv('SCAN_MAX_PARALLEL', '3'))  # Claims checked at once by the streaming scan
+SCAN_CLAIM_TIMEOUT_SECONDS = float(os.getenv('SCAN_CLAIM_TIMEOUT_SECONDS', '20'))  # Per-claim limit in the streaming scan
+SPECULATIVE_CHECK = os.getenv('SPECULATIVE_CHECK', 'true').lower() == 'true'  # /api/verify starts the check while routing
+SPECULATIVE_CHECK_MIN_QUOTA = int(os.getenv('SPECULATIVE_CHECK_MIN_QUOTA', '5'))  # Don't speculate with fewer Google requests left today
+
+# Voice websocket: client audio is buffered into chunks of this size before going upstream
+AUDIO_COALESCE_MS = float(os.getenv('AUDIO_COALESCE_MS', '60'))  # 0 = forward every client frame as-is
+AUDIO_COALESCE_MAX_DELAY_MS = float(os.getenv('AUDIO_COALESCE_MAX_DELAY_MS', '80'))  # Oldest buffered audio is sent after this long
+VAD_ENABLED = os.getenv('VAD_ENABLED', 'true').lower() == 'true'  # Drop silence between utterances before it goes upstream
+VAD_MIN_RMS = float(os.getenv('VAD_MIN_RMS', '300'))  # Quietest 16-bit RMS level counted as speech (the noise floor can raise it)
+VAD_HANGOVER_MS = float(os.getenv('VAD_HANGOVER_MS', '500'))  # Silence still forwarded after speech before audioStreamEnd
+VAD_PREROLL_MS = float(os.getenv('VAD_PREROLL_MS', '200'))  # Silence forwarded ahead of speech onset
+VOICE_TOOL_TIMEOUT_SECONDS = float(os.getenv('VOICE_TOOL_TIMEOUT_SECONDS', '12'))  # verify_fact answers UNCERTAIN after this long
+VOICE_CHECK_SNIPPETS = os.getenv('VOICE_CHECK_SNIPPETS', 'false').lower() == 'true'  # The voice agent only reads explanation + 2 sources
+voice_stats = VoiceStats()
 
-# Initialize Groq client (for text-based agents)
-groq_client = Groq(api_key=GROQ_API_KEY)
+# Initialize Groq client (for text-based agents) - async so LLM latency doesn't block the event loop
+groq_client = AsyncGroq(api_key=GROQ_API_KEY)
+
+# Per-provider limits on in-flight LLM calls
+GROQ_CONCURRENCY = int(os.getenv('GROQ_CONCURRENCY', '16'))
+GEMINI_CONCURRENCY = int(os.getenv('GEMINI_CONCURRENCY', '8'))
+groq_semaphore = asyncio.Semaphore(GROQ_CONCURRENCY)
+gemini_semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
+
+# Long-lived Gemini clients, one per API key (reuses connections instead of a new client per call)
+genai_clients = GenAIClientRegistry()
 
 # Initialize Gemini client (for voice/audio only)
-gemini_voice_client = genai.Client(api_key=GOOGLE_API_KEY_VOICE)
+gemini_voice_client = genai_clients.get(GOOGLE_API_KEY_VOICE)
+
+async def generate_with_google_key(**request) -> Any:
+    """
+    One Gemini generate_content call on the best key from the scheduler, using
+    that key's pooled client. The outcome is reported back to the scheduler.
+    """
+    api_key = await google_keys.acquire(GOOGLE_KEY_MAX_WAIT_SECONDS)
+    if api_key is None:
+        raise GoogleKeysExhaustedError("All Google API keys have reached their quota limit")
+    
+    started = time.time()
+    try:
+        async with gemini_semaphore:
+            response = await genai_clients.generate_content(api_key, **request)
+    except Exception as e:
+        if is_quota_error(e):
+            google_keys.report_rate_limited(api_key, str(e))
+        else:
+            google_keys.report_error(api_key)
+        raise
+    
+    google_keys.report_success(api_key, time.time() - started)
+    return response
 
 print(f"✅ Groq API Key loaded: {GROQ_API_KEY[:10]}...")
 print(f"✅ Google API Key (voice only): {GOOGLE_API_KEY_VOICE[:10]}...")
@@ -126,132 +249,359 @@ CHECKER_TOOLS = [
     {"google_search": {}}
 ]
 
+# Gemini Live session setup, sent once per upstream connection (use GOOGLE_API_KEY_VOICE for voice)
+GEMINI_LIVE_URL = os.getenv('GEMINI_LIVE_URL') or (  # Override to point voice sessions elsewhere (e.g. voice_loadtest.py's fake server)
+    f"wss://generativelanguage.googleapis.com/ws/google.ai.generativelanguage.v1beta.GenerativeService.BidiGenerateContent?key={GOOGLE_API_KEY_VOICE}"
+)
+LIVE_SETUP_MESSAGE = {
+    "setup": {
+        "model": "models/gemini-2.5-flash-native-audio-preview-09-2025",
+        "generationConfig": {
+            "responseModalities": ["AUDIO"],
+            "speechConfig": {
+                "voiceConfig": {
+                    "prebuiltVoiceConfig": {
+                        "voiceName": "Puck"
+                    }
+                }
+            }
+        },
+        "systemInstruction": {
+            "parts": [{
+                "text": "You are the Voice Main Agent. You listen to the user. You have access to a tool called 'verify_fact'. If the user asks ANY question about facts, news, weather, or reality, you MUST use 'verify_fact' to check it. Do not answer from your own knowledge. Always cite the source provided by the tool. Be concise and conversational."
+            }]
+        },
+        "tools": LIVE_AGENT_TOOLS
+    }
+}
+
+# Pre-warmed upstream Gemini Live connections handed to new voice sessions (0 = connect per session)
+live_pool = LiveConnectionPool(
+    GEMINI_LIVE_URL,
+    LIVE_SETUP_MESSAGE,
+    size=int(os.getenv('VOICE_POOL_SIZE', '2')),
+    max_idle_seconds=float(os.getenv('VOICE_POOL_MAX_IDLE_SECONDS', '120')),  # Gemini Live sessions have a limited lifetime
+    active_seconds=float(os.getenv('VOICE_POOL_ACTIVE_SECONDS', '600'))  # Keep warming this long after the last session
+)
+
+# --- HELPER: FETCH + PARSE SOURCE PAGE ---
+async def stream_page_sentences(uri: str, max_length: int = 10000, etag: Optional[str] = None,
+                                last_modified: Optional[str] = None) -> Tuple[Optional[List[str]], Dict[str, Optional[str]]]:
+    """
+    Streams the page through SentenceStream, reading only until max_length characters
+    of text (or FETCH_MAX_BYTES of HTML) have been collected. Returns (None, validators)
+    on 304 Not Modified.
+
+    With the parse pool, the body is read in rounds of PARSE_BYTES_PER_CHAR * max_length
+    bytes (doubling each round) and the prefix read so far is parsed on a worker; reading
+    stops as soon as a round fills the text budget.
+    """
+    async with open_page(uri, etag, last_modified) as response:
+        validators = page_validators(response, etag, last_modified)
+        if response.status == 304:
+            return None, validators
+        
+        if parse_pool.enabled:
+            body = bytearray()
+            chunks = iter_body(response)
+            budget = max_length * PARSE_BYTES_PER_CHAR
+            while True:
+                exhausted = True
+                async for chunk in chunks:
+                    body.extend(chunk)
+                    if len(body) >= budget:
+                        exhausted = False
+                        break
+                sentences, full = await parse_pool.run(stream_parse_sentences, bytes(body), max_length, response.charset)
+                if full or exhausted:
+                    break
+                budget *= 2  # Mostly markup so far; read further and parse the longer prefix
+            print(f"📥 Read {len(body) // 1024} KB from {uri[:50]} ({len(sentences)} sentences)")
+            return sentences, validators
+        
+        stream = SentenceStream(max_length, encoding=response.charset)
+        sentences = []
+        async for chunk in iter_body(response):
+            sentences.extend(stream.feed(chunk))
+            if stream.full:
+                break
+        sentences.extend(stream.close())
+        print(f"📥 Streamed {stream.bytes_fed // 1024} KB from {uri[:50]} ({len(sentences)} sentences)")
+        return sentences, validators
+
+async def load_page_sentences(uri: str, max_length: int = 10000) -> List[str]:
+    """
+    Returns the sentence list for a page, from the page cache when possible.
+    Stale entries are revalidated with ETag/Last-Modified instead of refetched.
+    """
+    cached_page = page_cache.get(uri)
+    if cached_page and time.time() - cached_page["fetched_at"] < PAGE_CACHE_FRESH_SECONDS:
+        print(f"📄 Using cached page for {uri[:50]}...")
+        return cached_page["sentences"]
+    
+    etag = cached_page.get("etag") if cached_page else None
+    last_modified = cached_page.get("last_modified") if cached_page else None
+    
+    if STREAMING_INGESTION:
+        sentences, validators = await stream_page_sentences(uri, max_length, etag, last_modified)
+    else:
+        content, validators = await fetch_page_if_modified(uri, etag, last_modified)
+        sentences = await parse_pool.run(parse_page_sentences, content, max_length) if content is not None else None
+    
+    if sentences is None and cached_page:
+        print(f"📄 Page not modified, reusing cached parse for {uri[:50]}...")
+        sentences = cached_page["sentences"]
+    elif sentences is None:
+        sentences = []
+    
+    page_cache.set(uri, {"sentences": sentences, "fetched_at": time.time(), **validators})
+    return sentences
+
 # --- HELPER: FETCH SOURCE SNIPPET ---
-async def fetch_snippet_from_source(uri: str, query: str, max_length: int = 10000) -> Optional[str]:
+def match_hint_sentences(hints: List[str], sentences: List[str], limit: int = 3) -> List[str]:
+    """Map Gemini's "first 5-10 words" hints back to the page's own (verbatim) sentences."""
+    matched = []
+    for hint_line in hints:
+        hint = re.sub(r'^[-*•]\s*', '', hint_line).strip()[:50]
+        if len(hint) < 10:
+            continue
+            
+        for sentence in sentences:
+            if hint.lower() in sentence.lower()[:100]:
+                matched.append(sentence)
+                if len(matched) >= limit:
+                    return matched
+    return matched
+
+def store_snippet(cache_key: str, top_sentences: List[str]) -> str:
+    """Format the chosen sentences as a verbatim snippet and cache the outcome."""
+    if top_sentences:
+        snippet = ' '.join(top_sentences[:3])
+        # Limit total length
+        if len(snippet) > 500:
+            snippet = snippet[:500] + "..."
+        result = f'"{snippet}"'  # Wrap in quotes to show it's verbatim
+        # Cache the result
+        snippet_cache.set(cache_key, result)
+        return result
+    else:
+        no_snippet = "No relevant snippet found"
+        snippet_cache.set(cache_key, no_snippet, negative=True)
+        return no_snippet
+
+class SourceHints(BaseModel):
+    source: int
+    sentence_starts: List[str]
+
+class SnippetHintBatch:
+    """
+    Sources of one check whose sentences had no BM25 match. Instead of one Gemini
+    hint call per source, resolve() asks for all of them in a single
+    structured-output request and maps the hints back to each source's sentences.
+    """
+    def __init__(self, query: str):
+        self.query = query
+        self.pending: Dict[str, Tuple[str, List[str]]] = {}  # uri -> (cache_key, sentences)
+    
+    def defer(self, uri: str, cache_key: str, sentences: List[str]) -> None:
+        self.pending[uri] = (cache_key, sentences)
+    
+    def mark(self, sources: List[Dict[str, Any]], message: str) -> None:
+        for source in sources:
+            if source['uri'] in self.pending:
+                source['snippet'] = message
+        self.pending.clear()
+    
+    async def request_hints(self) -> Dict[str, List[str]]:
+        """One structured-output Gemini call returning hint lines for every deferred uri."""
+        uris = list(self.pending)
+        articles = '\n\n'.join(
+            f"[Source {i}]\n{' '.join(self.pending[uri][1])[:5000]}" for i, uri in enumerate(uris)
+        )
+        prompt = f"""For each source below, identify which sentences are most relevant to: "{self.query}"
+
+{articles}
+
+For each source, list the first 5-10 words of up to 3 relevant sentences, so I can find them in the original text. Use the source number as "source"."""
+        
+        print(f"🧩 Requesting snippet hints for {len(uris)} source(s) in one batch")
+        response = await generate_with_google_key(
+            model="gemini-2.5-flash",
+            contents=prompt,
+            config={
+                "temperature": 0.0,
+                "response_mime_type": "application/json",
+                "response_schema": list[SourceHints]
+            }
+        )
+        
+        parsed = response.parsed
+        if parsed is None:
+            parsed = [SourceHints(**item) for item in json.loads(response.text or "[]")]
+        hints_by_uri: Dict[str, List[str]] = {}
+        for entry in parsed:
+            if 0 <= entry.source < len(uris):
+                hints_by_uri.setdefault(uris[entry.source], []).extend(entry.sentence_starts)
+        return hints_by_uri
+    
+    async def resolve(self, sources: List[Dict[str, Any]], timeout: Optional[float] = None) -> None:
+        """Fill in the snippet of every deferred source, within timeout seconds if given."""
+        if not self.pending:
+            return
+        if timeout is not None and timeout <= 0:
+            self.mark(sources, "Extraction skipped (timeout)")
+            return
+        try:
+            hints_by_uri = await asyncio.wait_for(self.request_hints(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⏱️ Snippet hint batch timed out, {len(self.pending)} source(s) skipped")
+            self.mark(sources, "Extraction skipped (timeout)")
+            return
+        except Exception as e:
+            if is_quota_error(e):
+                print(f"⚠️ Rate limit hit on snippet hint batch, {len(self.pending)} source(s) skipped")
+                self.mark(sources, "Rate limit reached")
+            else:
+                print(f"Snippet hint batch error: {e}")
+                self.mark(sources, "Snippet extraction failed")
+            return
+        
+        snippets = {}
+        for uri, (cache_key, sentences) in self.pending.items():
+            snippets[uri] = store_snippet(cache_key, match_hint_sentences(hints_by_uri.get(uri, []), sentences))
+        for source in sources:
+            if source['uri'] in snippets:
+                source['snippet'] = snippets[source['uri']]
+        self.pending.clear()
+
+async def fetch_snippet_from_source(uri: str, query: str, max_length: int = 10000,
+                                    hint_batch: Optional[SnippetHintBatch] = None) -> Optional[str]:
     """
     Fetches the actual webpage content and extracts exact verbatim quotes
     that are relevant to the given query. Uses caching to avoid redundant requests.
+    With a hint_batch, a page with no local match is left to the batch's single
+    Gemini request and None is returned.
     """
     # Check cache first
     cache_key = f"{uri}:{query[:50]}"
-    if cache_key in snippet_cache:
+    cached_snippet = snippet_cache.get(cache_key)
+    if cached_snippet is not None:
         print(f"📦 Using cached snippet for {uri[:50]}...")
-        return snippet_cache[cache_key]
+        return cached_snippet
     
     try:
-        # Fetch with timeout and user agent
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(uri, timeout=5, headers=headers, allow_redirects=True)
-        response.raise_for_status()
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Get text content
-        text = soup.get_text(separator=' ', strip=True)
-        
-        # Clean up whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        # Fetch (or reuse) the cleaned, sentence-split page
+        sentences = await load_page_sentences(uri, max_length)
         
-        # Limit text length to avoid huge API calls
-        if len(text) > max_length:
-            text = text[:max_length]
+        # BM25 over the page's sentences; query terms are stemmed once per query
+        top_sentences = await parse_pool.run(rank_sentences, sentences, prepare_query(query), 3)
         
-        # Split into sentences (simple sentence boundary detection)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        
-        # Extract keywords from query for matching
-        query_keywords = set(re.findall(r'\b\w{3,}\b', query.lower()))
-        
-        # Score each sentence by keyword overlap
-        scored_sentences = []
-        for sentence in sentences:
-            if len(sentence) < 20 or len(sentence) > 500:  # Skip very short/long sentences
-                continue
-            
-            sentence_words = set(re.findall(r'\b\w{3,}\b', sentence.lower()))
-            overlap = len(query_keywords & sentence_words)
-            
-            if overlap > 0:
-                scored_sentences.append((overlap, sentence))
-        
-        # Sort by relevance and take top 2-3 sentences
-        scored_sentences.sort(reverse=True, key=lambda x: x[0])
-        top_sentences = [sent for _, sent in scored_sentences[:3]]
+        if not top_sentences and hint_batch is not None:
+            hint_batch.defer(uri, cache_key, sentences)
+            return None
         
         if not top_sentences:
             # Fallback: use Gemini to identify relevant sentences, then extract exact text
-            # Use rotating Google API key for snippet extraction
-            snippet_client = genai.Client(api_key=get_next_google_key())
-            snippet_ai = snippet_client.aio
-            
             snippet_prompt = f"""From this article, identify which sentences are most relevant to: "{query}"
 
 Article text:
-{text[:5000]}
+{' '.join(sentences)[:5000]}
 
 List the first 5-10 words of each relevant sentence, so I can find them in the original text."""
             
-            snippet_response = await snippet_ai.models.generate_content(
+            # Pooled client on a scheduler-picked key (skips exhausted keys)
+            snippet_response = await generate_with_google_key(
                 model="gemini-2.5-flash",
                 contents=snippet_prompt,
                 config={"temperature": 0.0}
             )
             
             hints = snippet_response.text or ""
-            
-            # Try to find sentences matching the hints
-            for hint_line in hints.split('\n'):
-                hint = re.sub(r'^[-*•]\s*', '', hint_line).strip()[:50]
-                if len(hint) < 10:
-                    continue
-                    
-                for sentence in sentences:
-                    if hint.lower() in sentence.lower()[:100]:
-                        top_sentences.append(sentence)
-                        if len(top_sentences) >= 3:
-                            break
-                if len(top_sentences) >= 3:
-                    break
+            top_sentences = match_hint_sentences(hints.split('\n'), sentences)
         
-        if top_sentences:
-            snippet = ' '.join(top_sentences[:3])
-            # Limit total length
-            if len(snippet) > 500:
-                snippet = snippet[:500] + "..."
-            result = f'"{snippet}"'  # Wrap in quotes to show it's verbatim
-            # Cache the result
-            snippet_cache[cache_key] = result
-            return result
-        else:
-            no_snippet = "No relevant snippet found"
-            snippet_cache[cache_key] = no_snippet
-            return no_snippet
+        return store_snippet(cache_key, top_sentences)
         
-    except requests.Timeout:
+    except asyncio.TimeoutError:
         return "Source timeout - could not fetch content"
-    except requests.RequestException as e:
+    except aiohttp.ClientError as e:
         return f"Could not access source: {str(e)[:50]}"
     except Exception as e:
+        # Let rate limit errors reach the caller so it can stop further extraction
+        if is_quota_error(e):
+            raise
         print(f"Snippet extraction error for {uri}: {e}")
         return "Snippet extraction failed"
 
+async def extract_snippets_concurrently(sources: List[Dict[str, Any]], query: str,
+                                        on_snippet: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> None:
+    """
+    Fills in the 'snippet' field of each source, fetching up to SNIPPET_CONCURRENCY
+    sources at once. Whatever has not finished within SNIPPET_DEADLINE_SECONDS is
+    marked as skipped so the check can return with the snippets that did arrive.
+    Sources with no local match share one batched Gemini hint request at the end.
+    on_snippet(index, source) is called once per source as soon as its snippet is final.
+    """
+    announced = set()
+    
+    def announce(index: int):
+        if on_snippet and index not in announced:
+            announced.add(index)
+            on_snippet(index, sources[index])
+    
+    deadline = time.time() + SNIPPET_DEADLINE_SECONDS
+    hint_batch = SnippetHintBatch(query)
+    semaphore = asyncio.Semaphore(SNIPPET_CONCURRENCY)
+    rate_limited = asyncio.Event()
+    
+    async def extract(index: int, source: Dict[str, Any]):
+        async with semaphore:
+            if rate_limited.is_set():
+                source['snippet'] = "Extraction skipped (rate limit)"
+                return
+            try:
+                snippet = await fetch_snippet_from_source(source['uri'], query, hint_batch=hint_batch)
+                source['snippet'] = snippet if snippet else "Snippet unavailable"
+            except Exception as e:
+                if is_quota_error(e):
+                    print(f"⚠️ Rate limit hit on snippet {index+1}, skipping remaining sources")
+                    source['snippet'] = "Rate limit reached"
+                    rate_limited.set()
+                else:
+                    print(f"Error extracting snippet {index+1}: {e}")
+                    source['snippet'] = "Snippet extraction failed"
+            if source['uri'] not in hint_batch.pending:
+                announce(index)
+    
+    tasks = [asyncio.create_task(extract(i, source)) for i, source in enumerate(sources)]
+    _, pending = await asyncio.wait(tasks, timeout=SNIPPET_DEADLINE_SECONDS)
+    
+    if pending:
+        print(f"⏱️ Snippet deadline reached, {len(pending)} source(s) still pending")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    for source in sources:
+        if 'snippet' not in source:
+            source['snippet'] = "Extraction skipped (timeout)"
+    
+    if rate_limited.is_set():
+        hint_batch.mark(sources, "Extraction skipped (rate limit)")
+    else:
+        await hint_batch.resolve(sources, timeout=deadline - time.time())
+    
+    for index in range(len(sources)):
+        announce(index)
+
 # --- AGENT 0: TRANSCRIBER ---
 async def transcribe_audio(base64_audio: str, mime_type: str = "audio/webm") -> str:
     try:
-        # Use rotating API key
-        client = get_ai_client()
         clean_mime = mime_type.split(';')[0].strip()
         if not clean_mime:
             clean_mime = 'audio/webm'
         
-        response = client.models.generate_content(
+        # Use pooled client on a scheduler-picked key
+        response = await generate_with_google_key(
             model="gemini-2.5-flash",
             contents={
                 "parts": [
@@ -287,15 +637,16 @@ orchestrator_schema = {
 async def run_main_agent(user_text: str) -> Dict[str, Any]:
     try:
         # Use Groq for text-based routing
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are the Main Agent. Route queries. If factual/news/weather, DELEGATE_TO_CHECKER. If user asks to scan, monitor, or find latest rumors, use SCAN_CRISIS. Respond ONLY with valid JSON matching this schema: {\"action\": \"DIRECT_REPLY|DELEGATE_TO_CHECKER|SCAN_CRISIS\", \"reasoning\": \"string\", \"reply_text\": \"string\", \"checker_query\": \"string\", \"scan_topic\": \"string\"}"},
-                {"role": "user", "content": user_text}
-            ],
-            temperature=0.3,
-            response_format={"type": "json_object"}
-        )
+        async with groq_semaphore:
+            response = await groq_client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=[
+                    {"role": "system", "content": "You are the Main Agent. Route queries. If factual/news/weather, DELEGATE_TO_CHECKER. If user asks to scan, monitor, or find latest rumors, use SCAN_CRISIS. Respond ONLY with valid JSON matching this schema: {\"action\": \"DIRECT_REPLY|DELEGATE_TO_CHECKER|SCAN_CRISIS\", \"reasoning\": \"string\", \"reply_text\": \"string\", \"checker_query\": \"string\", \"scan_topic\": \"string\"}"},
+                    {"role": "user", "content": user_text}
+                ],
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
         
         text = response.choices[0].message.content
         if not text:
@@ -307,18 +658,114 @@ async def run_main_agent(user_text: str) -> Dict[str, Any]:
         return {"action": "DIRECT_REPLY", "reasoning": "Error", "reply_text": "System error."}
 
 # --- AGENT 2: CHECK AGENT ---
+CHECK_FAILED_EXPLANATION = "Tool access failed."
+
+def normalize_claim(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so trivially different claims share a cache entry."""
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', ' ', query.lower())).strip()
+
+# Snippet texts meaning extraction didn't get to run (timeout, rate limit), not that the page had no match
+DEGRADED_SNIPPETS = ("Extraction skipped", "Rate limit reached", "Snippet extraction failed", "Source timeout")
+
+def has_degraded_snippets(result: Dict[str, Any]) -> bool:
+    return any(str(source.get("snippet", "")).startswith(DEGRADED_SNIPPETS) for source in result.get("sources", []))
+
+def remember_verdict(cache_key: str, normalized: str, result: Dict[str, Any]) -> None:
+    """
+    Cache a finished check and index its claim for paraphrase reuse (failed checks are not kept).
+    A snippets check whose extraction degraded is kept as a plain verdict only, so the next
+    request that wants snippets runs extraction again instead of getting the placeholders.
+    """
+    if result["explanation"] == CHECK_FAILED_EXPLANATION:
+        return
+    tag = "snippets" if cache_key.endswith("|snippets") else "plain"
+    if tag == "snippets" and has_degraded_snippets(result):
+        print(f"📦 Snippets incomplete, caching only the verdict for '{normalized[:50]}'")
+        cache_key, tag = normalized, "plain"
+        result = {**result, "sources": [{k: v for k, v in source.items() if k != "snippet"} for source in result["sources"]]}
+    verdict_cache.set(cache_key, {"result": result, "checked_at": time.time()})
+    claim_index.add(normalized, cache_key, tag=tag)
+
+async def run_check_agent(query: str, extract_snippets: bool = True) -> Dict[str, Any]:
+    """
+    Cached, single-flight front for run_grounded_check. Fresh verdicts come from
+    verdict_cache, concurrent identical claims share one upstream call, and a
+    stale verdict is served if every Google API key is exhausted. Cancelling a
+    caller cancels the upstream check too once no other caller is waiting for it.
+    """
+    normalized = normalize_claim(query)
+    cache_key = f"{normalized}|snippets" if extract_snippets else normalized
+    
+    # A result with snippets also satisfies a request without them
+    cached = verdict_cache.get(cache_key)
+    if cached is None and not extract_snippets:
+        cached = verdict_cache.get(f"{normalized}|snippets")
+    if cached and time.time() - cached["checked_at"] < VERDICT_CACHE_TTL_SECONDS:
+        print(f"📦 Using cached verdict for '{query[:50]}'")
+        return {**copy.deepcopy(cached["result"]), "cached": True}
+    
+    # Rewording of a claim we already verified?
+    similar = claim_index.lookup(normalized, tags=("snippets",) if extract_snippets else None)
+    if similar:
+        prior = verdict_cache.get(similar["payload"])
+        if prior and time.time() - prior["checked_at"] < VERDICT_CACHE_TTL_SECONDS:
+            print(f"♻️ Reusing verdict of similar claim '{similar['claim'][:50]}' (similarity {similar['similarity']})")
+            return {
+                **copy.deepcopy(prior["result"]),
+                "cached": True,
+                "reused": True,
+                "reused_from": similar["claim"],
+                "similarity": similar["similarity"]
+            }
+    
+    task = inflight_checks.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(run_grounded_check(query, extract_snippets))
+        inflight_checks[cache_key] = task
+        
+        def finish_check(done_task: asyncio.Task):
+            if inflight_checks.get(cache_key) is done_task:
+                del inflight_checks[cache_key]
+            if done_task.cancelled() or done_task.exception() is not None:
+                return
+            remember_verdict(cache_key, normalized, done_task.result())
+        
+        task.add_done_callback(finish_check)
+    else:
+        print(f"🔗 Joining in-flight check for '{query[:50]}'")
+    
+    check_waiters[task] = check_waiters.get(task, 0) + 1
+    try:
+        # Shield so one caller disconnecting doesn't cancel the check for the others
+        result = await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if check_waiters[task] == 1 and not task.done():
+            print(f"🛑 Nobody waiting for '{query[:50]}' any more, cancelling the check")
+            del inflight_checks[cache_key]  # A new caller starts a fresh check instead of joining this one
+            task.cancel()
+        raise
+    except GoogleKeysExhaustedError:
+        if cached:
+            print(f"♻️ All keys exhausted, serving stale verdict for '{query[:50]}'")
+            return {**copy.deepcopy(cached["result"]), "cached": True, "stale": True}
+        raise
+    finally:
+        check_waiters[task] -= 1
+        if not check_waiters[task]:
+            del check_waiters[task]
+    
+    return copy.deepcopy(result)
+
 # NOTE: Still using Gemini for Check Agent because it has Google Search grounding
 # Groq doesn't have built-in search capability
-async def run_check_agent(query: str, extract_snippets: bool = True) -> Dict[str, Any]:
+async def run_grounded_check(query: str, extract_snippets: bool = True) -> Dict[str, Any]:
     # Try each Google API key in rotation until one works
     last_error = None
     
     for attempt in range(len(GOOGLE_API_KEYS)):
         try:
-            # Use rotating Google API key for Check Agent
-            current_key = get_next_google_key()
-            gemini_client = genai.Client(api_key=current_key)
-            response = gemini_client.models.generate_content(
+            # Scheduler only hands out keys with budget left, so exhausted keys cost nothing
+            response = await generate_with_google_key(
                 model="gemini-2.5-flash",
                 contents=f'Fact check: "{query}". Format: VERDICT: [REAL/FAKE/UNCERTAIN], CONFIDENCE: [0.0-1.0], EXPLANATION: [...]',
                 config={
@@ -330,18 +777,20 @@ async def run_check_agent(query: str, extract_snippets: bool = True) -> Dict[str
             # If we got here, the request succeeded - break out of retry loop
             break
             
+        except GoogleKeysExhaustedError:
+            print(f"❌ All {len(GOOGLE_API_KEYS)} Google API keys exhausted!")
+            raise
         except Exception as e:
             last_error = e
-            error_msg = str(e)
             
             # Check if it's a quota/rate limit error
-            if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg or "quota" in error_msg.lower():
+            if is_quota_error(e):
                 print(f"⚠️ API key exhausted, trying next key... ({attempt + 1}/{len(GOOGLE_API_KEYS)})")
                 if attempt < len(GOOGLE_API_KEYS) - 1:
                     continue  # Try next key
                 else:
                     print(f"❌ All {len(GOOGLE_API_KEYS)} Google API keys exhausted!")
-                    raise Exception("All Google API keys have reached their quota limit")
+                    raise GoogleKeysExhaustedError("All Google API keys have reached their quota limit")
             else:
                 # If it's not a quota error, don't retry
                 raise e
@@ -378,33 +827,41 @@ async def run_check_agent(query: str, extract_snippets: bool = True) -> Dict[str
         explanation = re.sub(r'CONFIDENCE:.*(\n|$)', '', explanation, flags=re.IGNORECASE)
         explanation = explanation.strip()
         
-        # NEW: Extract snippets from top sources (5-10 sources, sequential)
-        if extract_snippets and sources and ENABLE_SNIPPET_EXTRACTION:
+        # NEW: Extract snippets from top sources (5-10 sources)
+        if extract_snippets and sources and ENABLE_SNIPPET_EXTRACTION and CONCURRENT_SNIPPETS:
+            num_sources = min(len(sources), MAX_SNIPPETS)  # Process up to MAX_SNIPPETS
+            print(f"🔍 Extracting snippets from {num_sources} sources concurrently (limit {SNIPPET_CONCURRENCY})...")
+            await extract_snippets_concurrently(sources[:num_sources], query)
+        elif extract_snippets and sources and ENABLE_SNIPPET_EXTRACTION:
             num_sources = min(len(sources), MAX_SNIPPETS)  # Process up to MAX_SNIPPETS
             print(f"🔍 Extracting snippets from {num_sources} sources sequentially...")
             
             # Sequential extraction (not parallel) to avoid rate limits
+            hint_batch = SnippetHintBatch(query)
+            rate_limited = False
             for i in range(num_sources):
                 try:
-                    snippet = await fetch_snippet_from_source(sources[i]['uri'], query)
+                    snippet = await fetch_snippet_from_source(sources[i]['uri'], query, hint_batch=hint_batch)
                     sources[i]['snippet'] = snippet if snippet else "Snippet unavailable"
-                    
-                    # Add delay between requests to avoid rate limiting
-                    if i < num_sources - 1:  # Don't delay after last request
-                        await asyncio.sleep(SNIPPET_DELAY_SECONDS)
-                        
+                    # No fixed sleep: the fetcher spaces requests per host (domain_scheduler)
                 except Exception as e:
-                    error_msg = str(e)
-                    if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
+                    if is_quota_error(e):
                         print(f"⚠️ Rate limit hit on snippet {i+1}, stopping extraction")
                         sources[i]['snippet'] = "Rate limit reached"
                         # Stop extracting more snippets if we hit rate limit
                         for j in range(i+1, num_sources):
                             sources[j]['snippet'] = "Extraction skipped (rate limit)"
+                        rate_limited = True
                         break
                     else:
                         print(f"Error extracting snippet {i+1}: {e}")
                         sources[i]['snippet'] = "Snippet extraction failed"
+            
+            # One Gemini hint request for every source that had no local match
+            if rate_limited:
+                hint_batch.mark(sources[:num_sources], "Extraction skipped (rate limit)")
+            else:
+                await hint_batch.resolve(sources[:num_sources])
         
         return {
             "verdict": verdict,
@@ -417,16 +874,128 @@ async def run_check_agent(query: str, extract_snippets: bool = True) -> Dict[str
         return {
             "verdict": "UNCERTAIN",
             "confidence": 0,
-            "explanation": "Tool access failed.",
+            "explanation": CHECK_FAILED_EXPLANATION,
             "sources": []
         }
 
+def group_claims(claims: List[str]) -> Tuple[List[str], List[int]]:
+    """
+    De-duplicates a batch: returns (unique claims, group index of each input claim).
+    Claims match when they normalize identically or are near-duplicates by the claim
+    index's rules (MinHash similarity >= its threshold, plus its negation, number and
+    role guards). Each claim's signature is computed once.
+    """
+    unique: List[str] = []
+    groups: List[int] = []
+    by_normalized: Dict[str, int] = {}
+    signatures: List[ClaimSignature] = []
+    for claim in claims:
+        normalized = normalize_claim(claim)
+        group = by_normalized.get(normalized)
+        if group is None:
+            signature = ClaimSignature(normalized)
+            group = next((g for g, other in enumerate(signatures)
+                          if signature.similarity(other) >= claim_index.threshold), None)
+            if group is None:
+                group = len(unique)
+                unique.append(claim)
+                signatures.append(signature)
+            by_normalized[normalized] = group
+        groups.append(group)
+    return unique, groups
+
+async def iter_batch_checks(claims: List[str], extract_snippets: bool = True) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Runs the de-duplicated claims of a batch, at most min(BATCH_CHECK_CONCURRENCY, usable
+    Google keys) at a time, and yields the results for every input claim sharing a
+    check (as {"index", "claim", ...}) as soon as that check finishes.
+    """
+    unique, groups = group_claims(claims)
+    concurrency = max(1, min(BATCH_CHECK_CONCURRENCY, google_keys.usable_keys()))
+    print(f"📚 Batch of {len(claims)} claims -> {len(unique)} unique checks (concurrency {concurrency})")
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def check(group: int) -> Tuple[int, Dict[str, Any]]:
+        async with semaphore:
+            try:
+                return group, await run_check_agent(unique[group], extract_snippets)
+            except Exception as error:
+                print(f"Batch check error: {error}")
+                return group, {"verdict": "UNCERTAIN", "confidence": 0, "explanation": CHECK_FAILED_EXPLANATION, "sources": []}
+    
+    tasks = [asyncio.create_task(check(group)) for group in range(len(unique))]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            group, result = await next_done
+            members = [index for index, g in enumerate(groups) if g == group]
+            yield [{
+                "index": index,
+                "claim": claims[index],
+                **copy.deepcopy(result),
+                **({"duplicate_of": members[0]} if index != members[0] else {})
+            } for index in members]
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def stream_check_agent(query: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    run_check_agent as a sequence of events: a "verdict" event as soon as the grounded
+    call is done (sources without snippets), then one "snippet" event per source as its
+    snippet resolves (extracted concurrently), then "done". The finished result is cached
+    like a regular check with snippets.
+    """
+    normalized = normalize_claim(query)
+    cached = verdict_cache.get(f"{normalized}|snippets")
+    try:
+        if cached and time.time() - cached["checked_at"] < VERDICT_CACHE_TTL_SECONDS:
+            print(f"📦 Using cached verdict with snippets for '{query[:50]}'")
+            result = {**copy.deepcopy(cached["result"]), "cached": True}
+        else:
+            result = await run_check_agent(query, extract_snippets=False)
+    except Exception as error:
+        print(f"Check Agent Error: {error}")
+        yield {"type": "error", "message": CHECK_FAILED_EXPLANATION}
+        return
+    
+    num_sources = min(len(result["sources"]), MAX_SNIPPETS) if ENABLE_SNIPPET_EXTRACTION else 0
+    sources = result["sources"][:num_sources]
+    yield {"type": "verdict", **{k: v for k, v in result.items() if k != "sources"},
+           "sources": [{k: v for k, v in source.items() if k != "snippet"} for source in result["sources"]]}
+    
+    # Cached with snippets already: replay them
+    if all('snippet' in source for source in sources):
+        for index, source in enumerate(sources):
+            yield {"type": "snippet", "index": index, "uri": source["uri"], "snippet": source["snippet"]}
+        yield {"type": "done"}
+        return
+    
+    events: asyncio.Queue = asyncio.Queue()
+    extraction = asyncio.create_task(extract_snippets_concurrently(
+        sources, query,
+        on_snippet=lambda index, source: events.put_nowait({"type": "snippet", "index": index, "uri": source["uri"], "snippet": source["snippet"]})
+    ))
+    extraction.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+    finally:
+        if not extraction.done():
+            extraction.cancel()  # Client went away
+    
+    if extraction.exception() is None and not result.get("reused") and not result.get("stale"):
+        remember_verdict(f"{normalized}|snippets", normalized, {k: v for k, v in result.items() if k != "cached"})
+    yield {"type": "done"}
+
+def sse_event(event: Dict[str, Any]) -> str:
+    """One Server-Sent Events frame; the event name is the payload's "type"."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
 # --- AGENT 4: IMAGE AGENT ---
 async def process_image_content(base64_image: str, user_message: str = "") -> Dict[str, Any]:
     try:
-        # Use rotating API key
-        client = get_ai_client()
-        response = client.models.generate_content(
+        # Use pooled client on a scheduler-picked key
+        response = await generate_with_google_key(
             model="gemini-2.5-flash",
             contents={
                 "parts": [
@@ -467,43 +1036,52 @@ orchestrator_schema = {
     },
     "required": ['action', 'reasoning']
 }
+async def discover_trending_claims(topic: str) -> List[str]:
+    """Grounded Gemini search for the claims currently circulating about a topic."""
+    # Use pooled client on a scheduler-picked key
+    scan_response = await generate_with_google_key(
+        model="gemini-2.5-flash",
+        contents=f'Find the top 3 trending rumors, news headlines, or viral claims currently circulating about: "{topic}". Return ONLY a JSON array of strings, no markdown.',
+        config={
+            "tools": CHECKER_TOOLS
+        }
+    )
+    
+    claims = []
+    try:
+        clean_text = scan_response.text or "[]"
+        clean_text = clean_text.replace('```json', '').replace('```', '').strip()
+        claims = json.loads(clean_text)
+    except Exception as e:
+        print(f"Parse error: {e}")
+    return claims
+
+def new_trend_id() -> str:
+    return ''.join(random.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=9))
+
+def build_trend(topic: str, claim: str, check: Dict[str, Any], trend_id: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "id": trend_id or new_trend_id(),
+        "topic": topic,
+        "claim": claim,
+        "severity": 'HIGH' if check["verdict"] == 'FAKE' else 'MEDIUM',
+        "verdict": check["verdict"],
+        "confidence": check["confidence"],
+        "explanation": check["explanation"],
+        "sources": check["sources"],  # Include sources from fact check
+        "volume": random.randint(500, 1500),
+        "timestamp": None
+    }
+
 async def scan_crisis_trends(topic: str) -> List[Dict[str, Any]]:
     try:
-        # Use rotating API key
-        client = get_ai_client()
-        scan_response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=f'Find the top 3 trending rumors, news headlines, or viral claims currently circulating about: "{topic}". Return ONLY a JSON array of strings, no markdown.',
-            config={
-                "tools": CHECKER_TOOLS
-            }
-        )
-        
-        claims = []
-        try:
-            clean_text = scan_response.text or "[]"
-            clean_text = clean_text.replace('```json', '').replace('```', '').strip()
-            claims = json.loads(clean_text)
-        except Exception as e:
-            print(f"Parse error: {e}")
-        
+        claims = await discover_trending_claims(topic)
         if len(claims) == 0:
             return []
         
         async def check_claim(claim):
             check = await run_check_agent(claim)
-            return {
-                "id": ''.join(random.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=9)),
-                "topic": topic,
-                "claim": claim,
-                "severity": 'HIGH' if check["verdict"] == 'FAKE' else 'MEDIUM',
-                "verdict": check["verdict"],
-                "confidence": check["confidence"],
-                "explanation": check["explanation"],
-                "sources": check["sources"],  # Include sources from fact check
-                "volume": random.randint(500, 1500),
-                "timestamp": None
-            }
+            return build_trend(topic, claim, check)
         
         check_promises = [check_claim(claim) for claim in claims]
         return await asyncio.gather(*check_promises)
@@ -512,20 +1090,59 @@ async def scan_crisis_trends(topic: str) -> List[Dict[str, Any]]:
         print(f"Scanner Error: {error}")
         return []
 
-# --- SYNTHESIS ---
-async def run_main_agent_synthesis(user_query: str, check_result: Dict[str, Any]) -> str:
+async def stream_crisis_scan(topic: str, max_parallel: int = SCAN_MAX_PARALLEL,
+                             claim_timeout: float = SCAN_CLAIM_TIMEOUT_SECONDS) -> AsyncIterator[Dict[str, Any]]:
+    """
+    scan_crisis_trends as events: "claims" with the discovered claims (and their ids),
+    then one "trend" per claim as soon as its check completes, then "done". At most
+    max_parallel checks run at once, and a check slower than claim_timeout is reported
+    as UNCERTAIN (it keeps running in the background and its verdict is cached).
+    """
     try:
-        print(f"🔍 Synthesis Input - User Query: {user_query[:100]}...")
-        print(f"🔍 Synthesis Input - Check Result: {check_result}")
+        claims = await discover_trending_claims(topic)
+    except Exception as error:
+        print(f"Scanner Error: {error}")
+        yield {"type": "error", "message": "Scan failed"}
+        return
+    
+    ids = [new_trend_id() for _ in claims]
+    yield {"type": "claims", "topic": topic, "claims": [{"id": i, "claim": c} for i, c in zip(ids, claims)]}
+    
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+    
+    async def check_claim(index: int, claim: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                check = await asyncio.wait_for(run_check_agent(claim), timeout=claim_timeout)
+            except asyncio.TimeoutError:
+                print(f"⏱️ Scan check timed out after {claim_timeout:g}s: {claim[:50]}")
+                check = {"verdict": "UNCERTAIN", "confidence": 0, "sources": [],
+                         "explanation": "Verification is taking longer than expected. Try again shortly."}
+            except Exception as error:
+                print(f"Scanner check error: {error}")
+                check = {"verdict": "UNCERTAIN", "confidence": 0, "sources": [], "explanation": CHECK_FAILED_EXPLANATION}
+        return {"type": "trend", "index": index, **build_trend(topic, claim, check, ids[index])}
+    
+    tasks = [asyncio.create_task(check_claim(i, claim)) for i, claim in enumerate(claims)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()  # No-op for finished checks; stops the rest if the client went away
+    yield {"type": "done"}
 
-        # Sanitize inputs to prevent Gemini issues
-        clean_user_query = str(user_query).replace('"', "'").strip()
-        clean_verdict = str(check_result.get("verdict", "UNCERTAIN")).strip()
-        clean_confidence = float(check_result.get("confidence", 0.5))
-        clean_explanation = str(check_result.get("explanation", "No explanation provided")).replace('"', "'").strip()
+# --- SYNTHESIS ---
+def synthesis_messages(user_query: str, check_result: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Groq chat messages for the synthesis step."""
+    # Sanitize inputs to prevent Gemini issues
+    clean_user_query = str(user_query).replace('"', "'").strip()
+    clean_verdict = str(check_result.get("verdict", "UNCERTAIN")).strip()
+    clean_confidence = float(check_result.get("confidence", 0.5))
+    clean_explanation = str(check_result.get("explanation", "No explanation provided")).replace('"', "'").strip()
 
-        # Create a professional fact-checking response prompt
-        synthesis_prompt = f"""
+    # Create a professional fact-checking response prompt
+    synthesis_prompt = f"""
 You are a professional fact-checker creating a clear, well-structured response.
 
 USER ASKED: {clean_user_query}
@@ -565,16 +1182,29 @@ Example format:
 *This assessment is based on verification from multiple reliable sources.*
 """
 
+    return [
+        {"role": "system", "content": "You are a professional fact-checker. Create clear, well-structured responses with emojis and confidence levels."},
+        {"role": "user", "content": synthesis_prompt}
+    ]
+
+def synthesis_fallback(check_result: Dict[str, Any]) -> str:
+    """Emoji verdict text used when the synthesis model fails."""
+    verdict_emoji = "✅" if check_result["verdict"] == "REAL" else "❌" if check_result["verdict"] == "FAKE" else "⚠️"
+    return f"{verdict_emoji} **This claim is {check_result['verdict']}.**\n\n{check_result.get('explanation', 'Based on available information.')}\n\n**Confidence Level:** {int(check_result.get('confidence', 0.5) * 100)}%"
+
+async def run_main_agent_synthesis(user_query: str, check_result: Dict[str, Any]) -> str:
+    try:
+        print(f"🔍 Synthesis Input - User Query: {user_query[:100]}...")
+        print(f"🔍 Synthesis Input - Check Result: {check_result}")
+
         # Use Groq for synthesis (fast & free)
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a professional fact-checker. Create clear, well-structured responses with emojis and confidence levels."},
-                {"role": "user", "content": synthesis_prompt}
-            ],
-            temperature=0.3,
-            max_tokens=800
-        )
+        async with groq_semaphore:
+            response = await groq_client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=synthesis_messages(user_query, check_result),
+                temperature=0.3,
+                max_tokens=800
+            )
         
         if response and response.choices and response.choices[0].message.content:
             return response.choices[0].message.content.strip()
@@ -585,13 +1215,138 @@ Example format:
     except Exception as e:
         print(f"Synthesis Error: {e}")
         # Fallback response
-        verdict_emoji = "✅" if check_result["verdict"] == "REAL" else "❌" if check_result["verdict"] == "FAKE" else "⚠️"
-        fallback_text = f"{verdict_emoji} **This claim is {check_result['verdict']}.**\n\n{check_result.get('explanation', 'Based on available information.')}\n\n**Confidence Level:** {int(check_result.get('confidence', 0.5) * 100)}%"
+        fallback_text = synthesis_fallback(check_result)
         print(f"Synthesis: Using fallback response: {fallback_text[:100]}...")
         return fallback_text
 
+# Time-to-first-token of streamed syntheses (most recent SYNTHESIS_METRICS_WINDOW)
+SYNTHESIS_METRICS_WINDOW = 500
+synthesis_ttft: Deque[float] = deque(maxlen=SYNTHESIS_METRICS_WINDOW)
+synthesis_stream_stats = {"streams": 0, "fallbacks": 0}
+
+async def stream_main_agent_synthesis(user_query: str, check_result: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    run_main_agent_synthesis as "token" events straight from Groq's streaming API,
+    then "done" with the full text. If the stream fails (even midway), a "fallback"
+    event carries the emoji verdict text, which replaces whatever was sent so far.
+    The Groq slot is held only while tokens arrive; a slow client reads them from a queue.
+    """
+    synthesis_stream_stats["streams"] += 1
+    started = time.time()
+    parts: List[str] = []
+    deltas: asyncio.Queue = asyncio.Queue()
+    
+    async def read_stream():
+        try:
+            async with groq_semaphore:
+                stream = await groq_client.chat.completions.create(
+                    model="llama-3.3-70b-versatile",
+                    messages=synthesis_messages(user_query, check_result),
+                    temperature=0.3,
+                    max_tokens=800,
+                    stream=True
+                )
+                first = True
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        if first:
+                            synthesis_ttft.append(time.time() - started)
+                            first = False
+                        deltas.put_nowait(delta)
+        finally:
+            deltas.put_nowait(None)
+    
+    reader = asyncio.create_task(read_stream())
+    try:
+        while True:
+            delta = await deltas.get()
+            if delta is None:
+                break
+            parts.append(delta)
+            yield {"type": "token", "text": delta}
+        await reader  # Re-raises a failed stream
+        
+        text = ''.join(parts).strip()
+        if not text:
+            raise ValueError("Empty response from synthesis model")
+    except Exception as e:
+        print(f"Synthesis Stream Error: {e}")
+        synthesis_stream_stats["fallbacks"] += 1
+        text = synthesis_fallback(check_result)
+        yield {"type": "fallback", "text": text}
+    finally:
+        reader.cancel()  # Client went away: stop reading from Groq
+    
+    yield {"type": "done", "text": text}
+
+def synthesis_stats() -> Dict[str, Any]:
+    ordered = sorted(synthesis_ttft)
+    def percentile(fraction: float) -> Optional[int]:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000) if ordered else None
+    return {
+        **synthesis_stream_stats,
+        "ttft_p50_ms": percentile(0.5),
+        "ttft_p90_ms": percentile(0.9),
+        "ttft_p99_ms": percentile(0.99),
+        "samples": len(ordered)
+    }
+
+# --- PIPELINE: FUSED VERIFICATION ---
+SCAN_WORDS = re.compile(r'\b(scan|monitor|rumou?rs?|trending)\b', re.IGNORECASE)
+CHAT_OPENERS = re.compile(r'^\s*(hi|hello|hey|thanks|thank you|how are you|who are you|what can you|help)\b', re.IGNORECASE)
+QUESTION_PREFIX = re.compile(r'^\s*(is it true that|is it true|fact[- ]check:?|verify:?|check:?|did you know that|i heard that)\s*', re.IGNORECASE)
+
+def speculative_claim(user_text: str) -> Optional[str]:
+    """The claim to start checking before routing finishes, or None if the text doesn't look like a factual claim."""
+    if len(user_text.split()) < 4 or SCAN_WORDS.search(user_text) or CHAT_OPENERS.match(user_text):
+        return None
+    return QUESTION_PREFIX.sub('', user_text).rstrip(' ?').strip() or None
+
+async def run_verification(user_text: str) -> Dict[str, Any]:
+    """
+    Main agent -> check agent -> synthesis in one server-side call. When the text
+    looks factual, the grounded check starts while the main agent is still routing;
+    its result is kept if the router's checker_query turns out to be the same claim.
+    """
+    speculative_task = None
+    speculative_query = None
+    if SPECULATIVE_CHECK and google_keys.remaining_today() >= SPECULATIVE_CHECK_MIN_QUOTA:
+        speculative_query = speculative_claim(user_text)
+    if speculative_query:
+        print(f"🏎️ Starting speculative check: {speculative_query[:60]}...")
+        speculative_task = asyncio.create_task(run_check_agent(speculative_query))
+    
+    plan = await run_main_agent(user_text)
+    action = plan.get("action")
+    result: Dict[str, Any] = {"action": action, "plan": plan, "speculative": None}
+    
+    if action == "DELEGATE_TO_CHECKER":
+        query = plan.get("checker_query") or user_text
+        if speculative_task and (normalize_claim(query) == normalize_claim(speculative_query)
+                                 or claim_similarity(query, speculative_query) >= claim_index.threshold):
+            print("🏎️ Speculative check matches the routed claim, reusing it")
+            check_result = await speculative_task
+            result["speculative"] = "used"
+        else:
+            check_result = await run_check_agent(query)
+        result["check"] = check_result
+        result["text"] = await run_main_agent_synthesis(user_text, check_result)
+    elif action == "SCAN_CRISIS":
+        result["trends"] = await scan_crisis_trends(plan.get("scan_topic") or user_text)
+    else:
+        result["text"] = plan.get("reply_text") or "I can help you verify information."
+    
+    if speculative_task and result.get("speculative") != "used":
+        # Not awaited: let it finish so its verdict is cached, and retrieve any error quietly
+        speculative_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        result["speculative"] = "discarded"
+    return result
+
 # ==================== FASTAPI ROUTES ====================
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 # Pydantic models for request/response
 class TranscribeRequest(BaseModel):
     base64Audio: str
@@ -603,12 +1358,21 @@ class MainAgentRequest(BaseModel):
 class CheckAgentRequest(BaseModel):
     query: str
 
+class BatchCheckRequest(BaseModel):
+    claims: List[str]
+    extractSnippets: bool = True
+
 class ImageRequest(BaseModel):
     base64Image: str
     userMessage: str = ""
 
 class ScanCrisisRequest(BaseModel):
     topic: str
+    maxParallel: Optional[int] = None  # streaming scan only
+    claimTimeoutSeconds: Optional[float] = None  # streaming scan only
+
+class VerifyRequest(BaseModel):
+    userText: str
 
 class SynthesisRequest(BaseModel):
     userQuery: str
@@ -630,6 +1394,39 @@ async def api_check_agent(request: CheckAgentRequest):
     result = await run_check_agent(request.query)
     return result
 
+def limit_batch(claims: List[str]) -> Tuple[List[str], int]:
+    """The first BATCH_MAX_CLAIMS claims, and how many past the limit are not checked (reported as "skipped")."""
+    skipped = max(0, len(claims) - BATCH_MAX_CLAIMS)
+    if skipped:
+        print(f"📚 Batch of {len(claims)} claims exceeds BATCH_MAX_CLAIMS, skipping the last {skipped}")
+    return claims[:BATCH_MAX_CLAIMS], skipped
+
+@app.post("/api/check-agent/batch")
+async def api_check_agent_batch(request: BatchCheckRequest):
+    claims, skipped = limit_batch(request.claims)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(claims)
+    async for finished in iter_batch_checks(claims, request.extractSnippets):
+        for item in finished:
+            results[item["index"]] = item
+    return {"results": results, "skipped": skipped}
+
+@app.post("/api/check-agent/batch/stream")
+async def api_check_agent_batch_stream(request: BatchCheckRequest):
+    claims, skipped = limit_batch(request.claims)
+    async def events():
+        async for finished in iter_batch_checks(claims, request.extractSnippets):
+            for item in finished:
+                yield sse_event({"type": "result", **item})
+        yield sse_event({"type": "done", "skipped": skipped})
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/api/check-agent/stream")
+async def api_check_agent_stream(request: CheckAgentRequest):
+    async def events():
+        async for event in stream_check_agent(request.query):
+            yield sse_event(event)
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.post("/api/process-image")
 async def api_process_image(request: ImageRequest):
     result = await process_image_content(request.base64Image, request.userMessage)
@@ -640,6 +1437,17 @@ async def api_scan_crisis(request: ScanCrisisRequest):
     result = await scan_crisis_trends(request.topic)
     return result
 
+@app.post("/api/scan-crisis/stream")
+async def api_scan_crisis_stream(request: ScanCrisisRequest):
+    async def events():
+        async for event in stream_crisis_scan(
+            request.topic,
+            max_parallel=request.maxParallel or SCAN_MAX_PARALLEL,
+            claim_timeout=request.claimTimeoutSeconds or SCAN_CLAIM_TIMEOUT_SECONDS
+        ):
+            yield sse_event(event)
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.post("/api/synthesis")
 async def api_synthesis(request: SynthesisRequest):
     print(f"📩 Synthesis API called")
@@ -652,63 +1460,78 @@ async def api_synthesis(request: SynthesisRequest):
     print(f"📤 Synthesis API returning: {text[:100]}..." if text else "📤 Synthesis API returning: None/Empty")
     return {"text": text}
 
+@app.post("/api/verify")
+async def api_verify(request: VerifyRequest):
+    result = await run_verification(request.userText)
+    return result
+
+@app.post("/api/synthesis/stream")
+async def api_synthesis_stream(request: SynthesisRequest):
+    async def events():
+        async for event in stream_main_agent_synthesis(request.userQuery, request.checkResult):
+            yield sse_event(event)
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.get("/api/synthesis/stats")
+async def api_synthesis_stats():
+    return synthesis_stats()
+
 # WebSocket for Live Voice - CLEAN VERSION
 @app.websocket("/ws/live-session")
 async def websocket_live_session(websocket: WebSocket):
     await websocket.accept()
-    print("🎤 VOICE: Connected")
+    # ?binary=1: audio travels as raw PCM binary frames in both directions
+    binary_audio = websocket.query_params.get("binary") == "1"
+    session = voice_stats.open(binary_audio)
+    print(f"🎤 VOICE: Connected ({'binary' if binary_audio else 'json'} audio)")
     
     try:
-        # Use the correct Gemini Live WebSocket URL (use GOOGLE_API_KEY_VOICE for voice)
-        gemini_ws_url = f"wss://generativelanguage.googleapis.com/ws/google.ai.generativelanguage.v1beta.GenerativeService.BidiGenerateContent?key={GOOGLE_API_KEY_VOICE}"
-        
-        # Connect directly to Gemini Live WebSocket
-        async with websockets.connect(gemini_ws_url) as gemini_ws:
-            print("🎤 Connected to Gemini Live API")
-            
-            # Send setup message with native audio model
-            setup_message = {
-                "setup": {
-                    "model": "models/gemini-2.5-flash-native-audio-preview-09-2025",
-                    "generationConfig": {
-                        "responseModalities": ["AUDIO"],
-                        "speechConfig": {
-                            "voiceConfig": {
-                                "prebuiltVoiceConfig": {
-                                    "voiceName": "Puck"
-                                }
-                            }
-                        }
-                    },
-                    "systemInstruction": {
-                        "parts": [{
-                            "text": "You are the Voice Main Agent. You listen to the user. You have access to a tool called 'verify_fact'. If the user asks ANY question about facts, news, weather, or reality, you MUST use 'verify_fact' to check it. Do not answer from your own knowledge. Always cite the source provided by the tool. Be concise and conversational."
-                        }]
-                    },
-                    "tools": LIVE_AGENT_TOOLS
-                }
-            }
-            
-            await gemini_ws.send(json.dumps(setup_message))
+        # Upstream connection that has already completed model setup (pre-warmed when available)
+        async with live_pool.connection() as gemini_ws:
             await websocket.send_json({"type": "connected"})
             
             # Handle client audio streaming to Gemini
+            async def send_audio_upstream(pcm: bytes):
+                session.upstream_messages += 1
+                await gemini_ws.send(realtime_input_message(pcm))
+
             async def forward_audio_to_gemini():
+                coalescer = AudioCoalescer(pcm_bytes(AUDIO_COALESCE_MS), AUDIO_COALESCE_MAX_DELAY_MS / 1000)
+                vad = VoiceActivityDetector(VAD_MIN_RMS, VAD_HANGOVER_MS, VAD_PREROLL_MS, session) if VAD_ENABLED else None
                 try:
                     while True:
-                        data = await websocket.receive_json()
-                        if data.get("type") == "audio":
-                            # Convert base64 to proper PCM format and send to Gemini
-                            realtime_input = {
-                                "realtimeInput": {
-                                    "mediaChunks": [{
-                                        "data": data["audio"],
-                                        "mimeType": "audio/pcm;rate=16000"
-                                    }]
-                                }
-                            }
-                            await gemini_ws.send(json.dumps(realtime_input))
-                            
+                        # Only wait on a deadline while audio is buffered
+                        timeout = coalescer.time_left()
+                        try:
+                            message = await asyncio.wait_for(websocket.receive(), timeout)
+                        except asyncio.TimeoutError:
+                            await send_audio_upstream(coalescer.take())
+                            continue
+                        if message["type"] == "websocket.disconnect":
+                            raise WebSocketDisconnect(message.get("code", 1000))
+
+                        if message.get("bytes") is not None:
+                            pcm = message["bytes"]  # Binary frame: raw 16kHz PCM
+                        else:
+                            data = json.loads(message["text"])
+                            if data.get("type") != "audio":
+                                continue
+                            pcm = base64.b64decode(data["audio"])
+                        session.client_frames += 1
+                        session.client_bytes += len(pcm)
+
+                        speech_ended = False
+                        if vad:
+                            pcm, speech_ended = vad.process(pcm)
+                        chunk = coalescer.add(pcm) if pcm else None
+                        if chunk:
+                            await send_audio_upstream(chunk)
+                        if speech_ended:
+                            # Flush the utterance's tail, then tell Gemini the stream paused
+                            if coalescer.time_left() is not None:
+                                await send_audio_upstream(coalescer.take())
+                            await gemini_ws.send(AUDIO_STREAM_END_MESSAGE)
+
                 except WebSocketDisconnect:
                     print("Client WebSocket disconnected")
                     return
@@ -716,6 +1539,89 @@ async def websocket_live_session(websocket: WebSocket):
                     print(f"Audio forwarding error: {e}")
                     return
             
+            # verify_fact calls run as tasks so audio keeps flowing while a check is running
+            tool_tasks: Dict[str, asyncio.Task] = {}
+            late_checks: Set[asyncio.Task] = set()  # Timed-out checks still finishing for the cache
+
+            async def notify_client(payload: Dict[str, Any]):
+                # Best effort: the client may already be gone, the tool response still matters
+                try:
+                    await websocket.send_json(payload)
+                except Exception as e:
+                    print(f"⚠️ Could not notify voice client: {e}")
+
+            async def answer_tool_call(fc: Dict[str, Any]):
+                query = fc["args"].get("query", "")
+                print(f"🔍 Voice → Check: '{query}'")
+                session.tool_calls += 1
+                
+                await notify_client({
+                    "type": "agent_communication",
+                    "text": f"Voice Agent → Check Agent: \"{query}\""
+                })
+                
+                # Call our check agent
+                check = asyncio.create_task(run_check_agent(query, extract_snippets=VOICE_CHECK_SNIPPETS))
+                try:
+                    done, _ = await asyncio.wait({check}, timeout=VOICE_TOOL_TIMEOUT_SECONDS)
+                except asyncio.CancelledError:
+                    check.cancel()  # Call cancelled or session closed: stop the check unless someone else shares it
+                    raise
+                if not done:
+                    # Let it finish so the verdict lands in the cache (a repeat question is then instant),
+                    # but only while this session lasts
+                    print(f"⏱️ Voice check timed out after {VOICE_TOOL_TIMEOUT_SECONDS:g}s: '{query[:50]}'")
+                    session.tool_timeouts += 1
+                    late_checks.add(check)
+                    check.add_done_callback(late_checks.discard)
+                    check.add_done_callback(lambda task: task.cancelled() or task.exception())
+                    result = {"verdict": "UNCERTAIN", "sources": [],
+                              "explanation": "The check did not finish in time. Tell the user it could not be verified right now."}
+                elif check.exception() is not None:
+                    print(f"❌ Voice check error: {check.exception()}")
+                    result = {"verdict": "UNCERTAIN", "sources": [], "explanation": CHECK_FAILED_EXPLANATION}
+                else:
+                    result = check.result()
+                print(f"✅ Check → Voice: {result['verdict']}")
+                
+                await notify_client({
+                    "type": "agent_result",
+                    "verdict": result["verdict"],
+                    "query": query
+                })
+                
+                # Send tool response back to Gemini
+                tool_response = {
+                    "toolResponse": {
+                        "functionResponses": [{
+                            "name": fc["name"],
+                            "id": fc["id"],
+                            "response": {
+                                "verdict": result["verdict"],
+                                "explanation": result["explanation"][:200],
+                                "sources": result["sources"][:2]
+                            }
+                        }]
+                    }
+                }
+                try:
+                    await gemini_ws.send(json.dumps(tool_response))
+                except Exception as e:
+                    print(f"❌ Could not send tool response to Gemini: {e}")
+
+            def start_tool_call(fc: Dict[str, Any]):
+                task = asyncio.create_task(answer_tool_call(fc))
+                tool_tasks[fc["id"]] = task
+                task.add_done_callback(lambda done: tool_tasks.pop(fc["id"], None))
+
+            def cancel_tool_calls(ids: Optional[List[str]] = None, reason: str = "cancelled by Gemini"):
+                for call_id in list(tool_tasks if ids is None else ids):
+                    task = tool_tasks.pop(call_id, None)
+                    if task is not None and not task.done():
+                        task.cancel()
+                        session.tool_cancelled += 1
+                        print(f"🛑 Voice check cancelled ({reason})")
+            
             # Handle Gemini responses and forward to client
             async def process_gemini_responses():
                 try:
@@ -752,10 +1658,17 @@ async def websocket_live_session(websocket: WebSocket):
                                                 inline_data = part["inlineData"]
                                                 if inline_data.get("mimeType", "").startswith("audio/pcm"):
                                                     # Send 24kHz PCM audio back to client
-                                                    await websocket.send_json({
-                                                        "type": "audio",
-                                                        "audio": inline_data["data"]
-                                                    })
+                                                    session.downstream_frames += 1
+                                                    if binary_audio:
+                                                        pcm = base64.b64decode(inline_data["data"])
+                                                        session.downstream_bytes += len(pcm)
+                                                        await websocket.send_bytes(pcm)
+                                                    else:
+                                                        session.downstream_bytes += len(inline_data["data"])
+                                                        await websocket.send_json({
+                                                            "type": "audio",
+                                                            "audio": inline_data["data"]
+                                                        })
                                 
                                 # Agent transcript from output transcription
                                 if "outputTranscription" in server_content and server_content["outputTranscription"]:
@@ -770,43 +1683,13 @@ async def websocket_live_session(websocket: WebSocket):
                             
                             # Handle tool calls
                             if "toolCall" in response:
-                                tool_call = response["toolCall"]
-                                if "functionCalls" in tool_call:
-                                    for fc in tool_call["functionCalls"]:
-                                        if fc["name"] == "verify_fact":
-                                            query = fc["args"].get("query", "")
-                                            print(f"🔍 Voice → Check: '{query}'")
-                                            
-                                            await websocket.send_json({
-                                                "type": "agent_communication",
-                                                "text": f"Voice Agent → Check Agent: \"{query}\""
-                                            })
-                                            
-                                            # Call our check agent
-                                            result = await run_check_agent(query)
-                                            print(f"✅ Check → Voice: {result['verdict']}")
-                                            
-                                            await websocket.send_json({
-                                                "type": "agent_result",
-                                                "verdict": result["verdict"],
-                                                "query": query
-                                            })
-                                            
-                                            # Send tool response back to Gemini
-                                            tool_response = {
-                                                "toolResponse": {
-                                                    "functionResponses": [{
-                                                        "name": fc["name"],
-                                                        "id": fc["id"],
-                                                        "response": {
-                                                            "verdict": result["verdict"],
-                                                            "explanation": result["explanation"][:200],
-                                                            "sources": result["sources"][:2]
-                                                        }
-                                                    }]
-                                                }
-                                            }
-                                            await gemini_ws.send(json.dumps(tool_response))
+                                for fc in response["toolCall"].get("functionCalls", []):
+                                    if fc["name"] == "verify_fact":
+                                        start_tool_call(fc)
+                            
+                            # The user talked over a pending call; its answer is no longer wanted
+                            if "toolCallCancellation" in response:
+                                cancel_tool_calls(response["toolCallCancellation"].get("ids", []))
                                             
                         except json.JSONDecodeError as e:
                             print(f"JSON decode error: {e}")
@@ -820,12 +1703,17 @@ async def websocket_live_session(websocket: WebSocket):
                     print(f"❌ Gemini response error: {e}")
                     return
             
-            # Run both tasks concurrently
-            await asyncio.gather(
-                forward_audio_to_gemini(), 
-                process_gemini_responses(),
-                return_exceptions=True
-            )
+            # Run both directions until either side goes away, then stop the other and any checks
+            relays = [asyncio.create_task(forward_audio_to_gemini()), asyncio.create_task(process_gemini_responses())]
+            try:
+                await asyncio.wait(relays, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for relay in relays:
+                    relay.cancel()
+                cancel_tool_calls(reason="session closed")
+                for check in list(late_checks):
+                    check.cancel()
+                await asyncio.gather(*relays, return_exceptions=True)
     
     except Exception as e:
         print(f"❌ VOICE Error: {e}")
@@ -837,7 +1725,45 @@ async def websocket_live_session(websocket: WebSocket):
         except:
             pass
     finally:
-        print("🔌 VOICE: Closed")
+        voice_stats.close(session)
+        print(f"🔌 VOICE: Closed ({session.summary()})")
+
+@app.get("/api/cache/stats")
+async def api_cache_stats():
+    return {
+        "snippets": snippet_cache.stats(),
+        "pages": page_cache.stats(),
+        "verdicts": verdict_cache.stats(),
+        "claim_index": claim_index.stats()
+    }
+
+@app.get("/api/keys/stats")
+async def api_key_stats():
+    return {"google_keys": google_keys.stats(), "gemini_clients": genai_clients.stats()}
+
+@app.get("/api/fetch/stats")
+async def api_fetch_stats():
+    return {"politeness": domain_scheduler.stats(), "health": domain_health.stats()}
+
+@app.get("/api/parser/stats")
+async def api_parser_stats():
+    return parse_pool.stats()
+
+@app.get("/api/voice/stats")
+async def api_voice_stats():
+    return {**voice_stats.stats(), "upstream_pool": live_pool.stats()}
+
+@app.on_event("startup")
+async def startup_event():
+    await parse_pool.start()
+    await live_pool.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_session()
+    await genai_clients.close()
+    parse_pool.close()
+    await live_pool.close()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,179 @@
+"""
+Process pool for CPU-bound page work (HTML parsing, sentence ranking).
+
+HTML parsing and scoring used to run on the event-loop thread, so a burst of
+large pages stalled websockets and API traffic. ParsePool runs them in worker
+processes fed with raw bytes, so they use every core while the loop stays
+responsive. Once max_pending jobs are already queued, a further job runs
+in-process instead of waiting behind the queue, and the queue depth is kept
+as a metric.
+
+The functions sent to the pool live here (or in other side-effect-free
+modules). Workers come from a forkserver, not a plain fork: the pool can be
+rebuilt after a worker crash while aiohttp and SQLite threads are running,
+and forking a multi-threaded process can deadlock the child. The forkserver
+preloads only this module and the parser/ranker modules, and workers are
+started without the app's __main__, so main.py's setup (API clients, caches,
+the SQLite store) never runs in them.
+"""
+import asyncio
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from bs4 import BeautifulSoup
+from html_stream import SentenceStream
+
+PARSE_CHUNK_SIZE = 16 * 1024
+WORKER_PRELOAD = ['parse_pool', 'html_stream', 'sentence_ranker']
+
+
+def parse_page_sentences(content: bytes, max_length: int = 10000) -> List[str]:
+    """Cleans an HTML page and splits its text into sentences."""
+    soup = BeautifulSoup(content, 'lxml')
+
+    # Remove script and style elements
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+
+    # Get text content
+    text = soup.get_text(separator=' ', strip=True)
+
+    # Clean up whitespace
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    # Limit text length to avoid huge API calls
+    if len(text) > max_length:
+        text = text[:max_length]
+
+    # Split into sentences (simple sentence boundary detection)
+    return re.split(r'(?<=[.!?])\s+', text)
+
+
+def stream_parse_sentences(content: bytes, max_length: int = 10000,
+                           encoding: Optional[str] = None) -> Tuple[List[str], bool]:
+    """
+    SentenceStream over a downloaded body (or a prefix of it), stopping once the
+    text budget is full. Returns (sentences, whether the budget was filled).
+    """
+    stream = SentenceStream(max_length, encoding=encoding)
+    sentences = []
+    for start in range(0, len(content), PARSE_CHUNK_SIZE):
+        sentences.extend(stream.feed(content[start:start + PARSE_CHUNK_SIZE]))
+        if stream.full:
+            break
+    full = stream.full
+    sentences.extend(stream.close())
+    return sentences, full
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+@contextmanager
+def _without_main_module():
+    """
+    multiprocessing makes every new worker import the parent's __main__ (main.py
+    under `python main.py`). Worker jobs only need WORKER_PRELOAD, so hide where
+    __main__ came from while workers are being started.
+    """
+    main = sys.modules['__main__']
+    path = main.__dict__.pop('__file__', None)
+    spec = getattr(main, '__spec__', None)
+    main.__spec__ = None
+    try:
+        yield
+    finally:
+        main.__spec__ = spec
+        if path is not None:
+            main.__file__ = path
+
+
+class ParsePool:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.offloaded = 0
+        self.inline = 0
+        self.worker_failures = 0
+        self.total_wait = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            context = multiprocessing.get_context('forkserver')
+            # Import the parsers once in the server; workers forked from it skip that
+            context.set_forkserver_preload(WORKER_PRELOAD)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    async def start(self):
+        """Fork the workers now (at startup) rather than on the first page."""
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        with _without_main_module():  # Workers start on submit
+            futures = [loop.run_in_executor(executor, _warm_up) for _ in range(self.workers)]
+        pids = await asyncio.gather(*futures)
+        print(f"🧮 Parse pool ready ({self.workers} workers, {len(set(pids))} started)")
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """fn(*args) in a worker process, or in-process when the pool is disabled or saturated."""
+        if not self.enabled or self.pending >= self.max_pending:
+            self.inline += 1
+            return fn(*args)
+
+        self.pending += 1
+        self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        started = time.time()
+        executor = self._get_executor()
+        try:
+            with _without_main_module():  # Replacement workers start on submit
+                future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            result = await future
+            self.offloaded += 1
+            self.total_wait += time.time() - started
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a pathological page); rebuild the pool and do this job here.
+            # Only the first job to see this pool break replaces it, so a concurrent job
+            # doesn't shut down the pool that was just rebuilt (and cancel its jobs).
+            if self._executor is executor:
+                print("⚠️ Parse pool broken, restarting workers")
+                self.worker_failures += 1
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            self.inline += 1
+            return fn(*args)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.pending,
+            "max_queue_depth": self.max_pending_seen,
+            "queue_limit": self.max_pending,
+            "offloaded": self.offloaded,
+            "inline_fallbacks": self.inline,
+            "worker_failures": self.worker_failures,
+            "avg_offload_ms": round(self.total_wait / self.offloaded * 1000, 1) if self.offloaded else 0
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,96 @@
+"""
+BM25 ranking of a page's sentences against a claim.
+
+Query terms are tokenized, stopword-filtered and stemmed once per query
+(prepare_query is memoized). For a page, only the occurrences of those terms
+are counted: each sentence's tokens are mapped to query-term columns as a
+sparse (row, column) list and folded into a sentences x query-terms count
+matrix with np.bincount, then scored with BM25 using the page's own document
+frequencies and sentence lengths. Long boilerplate sentences no longer win
+just by containing more words, so fewer pages fall through to the Gemini
+fallback.
+"""
+import re
+from functools import lru_cache
+from typing import List, Tuple
+import numpy as np
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MIN_SENTENCE_LENGTH = 20
+MAX_SENTENCE_LENGTH = 500
+
+TOKEN_PATTERN = re.compile(r'\b\w{2,}\b')
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it its itself just me more most my no nor not now of off on once only or other our
+out over own same she should so some such than that the their them then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you your yours
+also said says according told news report reports reported today yesterday new one two
+""".split())
+
+# Longest suffix first; a light stemmer is enough to match "resigned"/"resigns"/"resignation"
+_SUFFIXES = ('ational', 'ations', 'ation', 'ments', 'ment', 'ness', 'ings', 'ing', 'edly', 'ies', 'ied',
+             'ers', 'er', 'ed', 'ly', 'es', 's')
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if suffix in ('ies', 'ied'):
+                word += 'y'
+            break
+    # Collapse a doubled final consonant left by -ed/-ing ("stopped" -> "stop")
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'aeiouls':
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+@lru_cache(maxsize=4096)
+def prepare_query(query: str) -> Tuple[str, ...]:
+    """Unique stemmed content terms of a query, computed once per query."""
+    return tuple(dict.fromkeys(tokenize(query)))
+
+
+def rank_sentences(sentences: List[str], query_terms: Tuple[str, ...], top_k: int = 3) -> List[str]:
+    """Return up to top_k sentences with a positive BM25 score, best first."""
+    if not query_terms:
+        return []
+    candidates = [s for s in sentences if MIN_SENTENCE_LENGTH <= len(s) <= MAX_SENTENCE_LENGTH]
+    if not candidates:
+        return []
+
+    columns = {term: i for i, term in enumerate(query_terms)}
+    rows, cols = [], []
+    lengths = np.empty(len(candidates), dtype=np.float64)
+    for row, sentence in enumerate(candidates):
+        tokens = tokenize(sentence)
+        lengths[row] = len(tokens)
+        for token in tokens:
+            col = columns.get(token)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    if not rows:
+        return []
+
+    n_docs, n_terms = len(candidates), len(query_terms)
+    flat = np.asarray(rows, dtype=np.int64) * n_terms + np.asarray(cols, dtype=np.int64)
+    tf = np.bincount(flat, minlength=n_docs * n_terms).reshape(n_docs, n_terms).astype(np.float64)
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((n_docs - df + 0.5) / (df + 0.5) + 1.0)
+    avg_length = max(lengths.mean(), 1.0)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length)
+    scores = (tf * (BM25_K1 + 1) / (tf + norm[:, None])) @ idf
+
+    order = np.argsort(-scores, kind='stable')[:top_k]
+    return [candidates[i] for i in order if scores[i] > 0]
@@ -0,0 +1,223 @@
+"""
+Shared async HTTP layer for fetching source pages.
+
+Every snippet fetch goes through one pooled aiohttp session per process, so a
+slow news site only occupies its own connection instead of blocking the whole
+event loop (which the old blocking `requests.get` did).
+
+Every request also waits for its host's turn in the per-domain politeness
+scheduler, so any module that fetches pages through here is governed by it,
+and is checked against the domain health registry first, so known-dead hosts
+and recently failed URLs are skipped without waiting for a timeout.
+"""
+import os
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+from urllib.robotparser import RobotFileParser
+import aiohttp
+from domain_scheduler import DomainScheduler, HostThrottled
+from domain_health import DomainHealthRegistry
+
+# Pool configuration
+FETCH_TIMEOUT_SECONDS = float(os.getenv('FETCH_TIMEOUT_SECONDS', '5'))  # Total time allowed per page fetch
+FETCH_MAX_CONNECTIONS = int(os.getenv('FETCH_MAX_CONNECTIONS', '100'))  # Open sockets across all hosts
+FETCH_MAX_PER_HOST = int(os.getenv('FETCH_MAX_PER_HOST', '4'))  # Open sockets to a single host
+FETCH_DNS_CACHE_SECONDS = int(os.getenv('FETCH_DNS_CACHE_SECONDS', '300'))  # How long resolved hosts are reused
+FETCH_KEEPALIVE_SECONDS = float(os.getenv('FETCH_KEEPALIVE_SECONDS', '30'))  # Idle time before a pooled socket closes
+FETCH_MAX_BYTES = int(os.getenv('FETCH_MAX_BYTES', str(2 * 1024 * 1024)))  # Stop reading a page body after this many bytes
+FETCH_CHUNK_SIZE = 16 * 1024
+
+# Per-host politeness
+FETCH_HOST_RATE_PER_SECOND = float(os.getenv('FETCH_HOST_RATE_PER_SECOND', '1'))  # Sustained requests/second to one host
+FETCH_HOST_BURST = float(os.getenv('FETCH_HOST_BURST', '3'))  # Requests to one host allowed back to back
+FETCH_HOST_MAX_WAIT_SECONDS = float(os.getenv('FETCH_HOST_MAX_WAIT_SECONDS', '5'))  # Give up instead of queueing longer
+FETCH_RESPECT_ROBOTS = os.getenv('FETCH_RESPECT_ROBOTS', 'false').lower() == 'true'  # Honour robots.txt Crawl-delay
+ROBOTS_TIMEOUT_SECONDS = 2
+
+# Domain health / circuit breaking
+HOST_BREAKER_FAILURES = int(os.getenv('HOST_BREAKER_FAILURES', '3'))  # Consecutive failures that open a host's breaker
+HOST_BREAKER_COOLDOWN_SECONDS = float(os.getenv('HOST_BREAKER_COOLDOWN_SECONDS', '60'))  # First open period (doubles per trip)
+FAILED_URL_BACKOFF_SECONDS = float(os.getenv('FAILED_URL_BACKOFF_SECONDS', '600'))  # First skip period for a failed URL (doubles)
+
+# Content types we can extract text from; anything else is rejected before the body is read
+HTML_CONTENT_TYPES = {'text/html', 'application/xhtml+xml', 'text/plain'}
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+class UnsupportedContentType(aiohttp.ClientError):
+    """Raised when a page is not HTML (PDFs, images, video...)."""
+
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_lock = asyncio.Lock()
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is not None and not _session.closed:
+        return _session
+
+    async with _session_lock:
+        if _session is None or _session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=FETCH_MAX_CONNECTIONS,
+                limit_per_host=FETCH_MAX_PER_HOST,
+                ttl_dns_cache=FETCH_DNS_CACHE_SECONDS,
+                keepalive_timeout=FETCH_KEEPALIVE_SECONDS,
+                enable_cleanup_closed=True
+            )
+            _session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECONDS),
+                headers=DEFAULT_HEADERS
+            )
+            print(f"🌐 Source fetcher pool ready ({FETCH_MAX_CONNECTIONS} conns, {FETCH_MAX_PER_HOST}/host)")
+    return _session
+
+
+async def fetch_crawl_delay(origin: str) -> Optional[float]:
+    """Crawl-delay from an origin's robots.txt (None if absent or unreachable)."""
+    session = await get_session()
+    try:
+        async with session.get(f"{origin}/robots.txt", timeout=aiohttp.ClientTimeout(total=ROBOTS_TIMEOUT_SECONDS)) as response:
+            if response.status != 200:
+                return None
+            text = await response.text(errors='ignore')
+    except (asyncio.TimeoutError, aiohttp.ClientError):
+        return None
+    parser = RobotFileParser()
+    parser.parse(text.splitlines())
+    delay = parser.crawl_delay(DEFAULT_HEADERS['User-Agent'])
+    return float(delay) if delay else None
+
+
+domain_scheduler = DomainScheduler(
+    rate_per_second=FETCH_HOST_RATE_PER_SECOND,
+    burst=FETCH_HOST_BURST,
+    max_wait_seconds=FETCH_HOST_MAX_WAIT_SECONDS,
+    robots_loader=fetch_crawl_delay if FETCH_RESPECT_ROBOTS else None
+)
+
+
+domain_health = DomainHealthRegistry(
+    breaker_failures=HOST_BREAKER_FAILURES,
+    breaker_cooldown_seconds=HOST_BREAKER_COOLDOWN_SECONDS,
+    url_backoff_seconds=FAILED_URL_BACKOFF_SECONDS
+)
+
+
+@asynccontextmanager
+async def _tracked_get(uri: str, headers: Optional[Dict[str, str]] = None) -> AsyncIterator[aiohttp.ClientResponse]:
+    """
+    session.get through the health registry and the host's politeness queue.
+    Exactly one outcome is recorded for the host and URL: success when the headers
+    arrive, or the error that happened before that.
+    """
+    probing = domain_health.check(uri)
+    started = time.monotonic()
+    outcome_recorded = False
+    try:
+        await domain_scheduler.acquire(uri)
+        session = await get_session()
+        started = time.monotonic()
+        async with session.get(uri, headers=headers, allow_redirects=True) as response:
+            if response.status == 304:
+                domain_health.record_success(uri, time.monotonic() - started)
+                outcome_recorded = True
+            else:
+                response.raise_for_status()
+                content_type = response.content_type.lower()
+                if response.headers.get('Content-Type') and content_type not in HTML_CONTENT_TYPES:
+                    raise UnsupportedContentType(f"Unsupported content type {content_type}")
+                domain_health.record_success(uri, time.monotonic() - started)
+                outcome_recorded = True
+            yield response
+    except HostThrottled:
+        raise
+    except UnsupportedContentType as error:
+        outcome_recorded = True
+        domain_health.record_failure(uri, error, host_failure=False)
+        raise
+    except (asyncio.TimeoutError, aiohttp.ClientError) as error:
+        # Once headers arrived the request already counted as a success; a failure
+        # while the caller reads the body must not record a second outcome
+        if not outcome_recorded:
+            outcome_recorded = True
+            host_failure = not (isinstance(error, aiohttp.ClientResponseError) and error.status in (404, 410))
+            domain_health.record_failure(uri, error, host_failure=host_failure)
+        raise
+    finally:
+        if probing and not outcome_recorded:
+            domain_health.release_probe(uri)
+
+
+@asynccontextmanager
+async def open_page(uri: str, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None) -> AsyncIterator[aiohttp.ClientResponse]:
+    """
+    Start a (conditional) GET and yield the response before its body is read.
+
+    Non-2xx responses other than 304 raise aiohttp.ClientResponseError, and
+    non-HTML content types raise UnsupportedContentType, both without
+    downloading the body. Waits for the host's turn first (HostThrottled if
+    that is more than FETCH_HOST_MAX_WAIT_SECONDS away); known-dead hosts and
+    recently failed URLs raise SourceUnavailable immediately.
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    async with _tracked_get(uri, headers or None) as response:
+        yield response
+
+
+def page_validators(response: aiohttp.ClientResponse, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """ETag/Last-Modified from a response, falling back to the ones we sent."""
+    return {
+        "etag": response.headers.get('ETag') or etag,
+        "last_modified": response.headers.get('Last-Modified') or last_modified
+    }
+
+
+async def iter_body(response: aiohttp.ClientResponse, max_bytes: int = FETCH_MAX_BYTES) -> AsyncIterator[bytes]:
+    """Yield the response body in chunks, stopping after max_bytes."""
+    remaining = max_bytes
+    async for chunk in response.content.iter_chunked(FETCH_CHUNK_SIZE):
+        if remaining <= 0:
+            break
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+        remaining -= len(chunk)
+        yield chunk
+
+
+async def fetch_page_if_modified(uri: str, etag: Optional[str] = None,
+                                 last_modified: Optional[str] = None) -> Tuple[Optional[bytes], Dict[str, Optional[str]]]:
+    """
+    Conditional GET using the validators from a previous fetch.
+
+    Returns (body, validators); body is None when the server answered
+    304 Not Modified. The body is capped at FETCH_MAX_BYTES. Raises the
+    same errors as open_page.
+    """
+    async with open_page(uri, etag, last_modified) as response:
+        validators = page_validators(response, etag, last_modified)
+        if response.status == 304:
+            return None, validators
+        return b''.join([chunk async for chunk in iter_body(response)]), validators
+
+
+async def close_session():
+    """Close the shared session (called on app shutdown)."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
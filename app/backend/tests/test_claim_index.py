@@ -0,0 +1,71 @@
+from claim_index import ClaimIndex, ClaimSignature, claim_similarity
+
+
+def test_paraphrase_is_similar():
+    assert claim_similarity("NASA confirms water on Mars", "NASA has confirmed water on Mars today") >= 0.8
+    assert claim_similarity("X CEO resigned", "CEO of X has resigned today") >= 0.8
+    assert claim_similarity("Biden wins the election", "Biden won the election") >= 0.8
+    assert claim_similarity("Eiffel Tower is in Paris", "Eiffel Tower located in Paris") >= 0.8
+    assert claim_similarity("Earthquake of magnitude 7 hits Japan", "Magnitude 7 earthquake hits Japan") >= 0.8
+
+
+def test_similarity_is_graded():
+    similarity = claim_similarity("Government announces nationwide lockdown starting Monday",
+                                  "Government announces strict nationwide lockdown starting Monday")
+    assert 0.8 <= similarity < 1.0
+    assert claim_similarity("Biden wins the election",
+                            "Biden wins the presidential election in a landslide victory") < 0.8
+
+
+def test_word_order_matters():
+    assert claim_similarity("Russia invaded Ukraine", "Ukraine invaded Russia") == 0.0
+
+
+def test_different_entity_negation_or_number_never_match():
+    assert claim_similarity("NASA found water on Mars", "NASA found water on the Moon") == 0.0
+    assert claim_similarity("The Eiffel Tower is in Paris", "The Eiffel Tower is in Berlin") == 0.0
+    assert claim_similarity("Trump won the 2020 election", "Biden won the 2020 election") == 0.0
+    assert claim_similarity("The vaccine is safe", "The vaccine is not safe") == 0.0
+    assert claim_similarity("Inflation hit 5% in 2022", "Inflation hit 9% in 2022") == 0.0
+
+
+def test_signature_is_reusable():
+    first = ClaimSignature("the eiffel tower is in paris")
+    assert first.similarity(ClaimSignature("The Eiffel Tower is in Paris")) == 1.0
+    assert first.similarity(ClaimSignature("the eiffel tower is in berlin")) == 0.0
+
+
+def test_lookup_reuses_near_duplicate():
+    index = ClaimIndex(threshold=0.8, max_entries=16)
+    index.add("NASA confirms water on Mars", "mars")
+    index.add("X CEO resigned", "ceo")
+    hit = index.lookup("NASA has confirmed water on Mars today")
+    assert hit is not None and hit["payload"] == "mars"
+    assert index.lookup("CEO of X has resigned today")["payload"] == "ceo"
+    assert index.lookup("NASA confirms water on the Moon") is None
+    assert index.lookup("Ukraine invaded Russia") is None
+
+
+def test_lookup_filters_by_tag():
+    index = ClaimIndex(threshold=0.8, max_entries=16)
+    index.add("NASA confirms water on Mars", "plain-result", tag="plain")
+    assert index.lookup("NASA confirms water on Mars", tags=("snippets",)) is None
+    index.add("NASA confirms water on Mars", "snippet-result", tag="snippets")
+    assert index.lookup("NASA confirms water on Mars", tags=("snippets",))["payload"] == "snippet-result"
+
+
+def test_ring_buffer_evicts_oldest():
+    index = ClaimIndex(threshold=0.8, max_entries=2)
+    index.add("the moon landing happened in 1969", 1)
+    index.add("water boils at sea level", 2)
+    index.add("the great wall is visible from space", 3)
+    assert len(index) == 2
+    assert index.lookup("the moon landing happened in 1969") is None
+    assert index.lookup("the great wall is visible from space")["payload"] == 3
+    assert index.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_not_reused():
+    index = ClaimIndex(threshold=0.8, max_entries=16, ttl_seconds=-1)
+    index.add("NASA confirms water on Mars", "mars")
+    assert index.lookup("NASA confirms water on Mars") is None
@@ -0,0 +1,74 @@
+import time
+import aiohttp
+import pytest
+import domain_health
+from domain_health import DomainHealthRegistry, SourceUnavailable
+
+URL = "https://news.example.com/story"
+
+
+def registry(**overrides) -> DomainHealthRegistry:
+    settings = {"breaker_failures": 2, "breaker_cooldown_seconds": 0.05, "url_backoff_seconds": 600}
+    settings.update(overrides)
+    return DomainHealthRegistry(**settings)
+
+
+def trip(health: DomainHealthRegistry):
+    for i in range(health.breaker_failures):
+        health.check(f"{URL}/{i}")
+        health.record_failure(f"{URL}/{i}", aiohttp.ServerTimeoutError())
+
+
+def test_failed_url_backs_off():
+    health = registry()
+    health.check(URL)
+    health.record_failure(URL, aiohttp.ClientResponseError(None, (), status=404), host_failure=False)
+    with pytest.raises(SourceUnavailable):
+        health.check(URL)
+    assert health.check("https://news.example.com/other") is False
+
+
+def test_breaker_opens_then_probes():
+    health = registry()
+    trip(health)
+    with pytest.raises(SourceUnavailable):
+        health.check(URL)
+    time.sleep(0.06)
+    assert health.check(URL) is True  # Half-open: this request is the probe
+    with pytest.raises(SourceUnavailable):
+        health.check(URL)  # Only one probe at a time
+    health.record_success(URL, 0.1)
+    assert health.check(URL) is False
+    assert health.stats()["hosts"]["news.example.com"]["state"] == "closed"
+
+
+def test_failed_probe_reopens_with_longer_cooldown():
+    health = registry()
+    trip(health)
+    time.sleep(0.06)
+    assert health.check(URL) is True
+    health.record_failure(URL, aiohttp.ServerTimeoutError())
+    time.sleep(0.06)
+    with pytest.raises(SourceUnavailable):
+        health.check("https://news.example.com/next")  # Cooldown doubled to 0.1s
+
+
+def test_released_probe_lets_next_request_probe():
+    health = registry()
+    trip(health)
+    time.sleep(0.06)
+    assert health.check(URL) is True
+    health.release_probe(URL)
+    assert health.check("https://news.example.com/next") is True
+
+
+def test_idle_healthy_hosts_are_pruned(monkeypatch):
+    monkeypatch.setattr(domain_health, "HOST_IDLE_SECONDS", 0)
+    monkeypatch.setattr(domain_health, "PRUNE_EVERY", 4)
+    health = registry(breaker_cooldown_seconds=600)
+    health.check("https://healthy.example.com/a")
+    health.record_success("https://healthy.example.com/a", 0.1)
+    trip(health)
+    health.check("https://other.example.com/")
+    assert "healthy.example.com" not in health._hosts
+    assert "news.example.com" in health._hosts  # Open breakers are kept
@@ -0,0 +1,49 @@
+import asyncio
+from key_scheduler import KeyScheduler
+
+
+def test_spreads_requests_across_keys():
+    keys = KeyScheduler(["a", "b"], rpm_limit=5, rpd_limit=20)
+    assert {keys.try_acquire(), keys.try_acquire()} == {"a", "b"}
+
+
+def test_per_minute_bucket_runs_out():
+    keys = KeyScheduler(["a"], rpm_limit=2, rpd_limit=20)
+    assert keys.try_acquire() == "a"
+    assert keys.try_acquire() == "a"
+    assert keys.try_acquire() is None
+
+
+def test_daily_budget_and_remaining_today():
+    keys = KeyScheduler(["a", "b"], rpm_limit=100, rpd_limit=3)
+    assert keys.remaining_today() == 6
+    for _ in range(3):
+        keys.try_acquire()
+    assert keys.remaining_today() == 3
+    for _ in range(3):
+        assert keys.try_acquire() is not None
+    assert keys.try_acquire() is None
+    assert keys.usable_keys() == 0
+    assert asyncio.run(keys.acquire(max_wait=1)) is None
+
+
+def test_rate_limited_key_cools_down():
+    keys = KeyScheduler(["a", "b"], rpm_limit=100, rpd_limit=20)
+    keys.report_rate_limited("a", "429 RESOURCE_EXHAUSTED")
+    assert keys.usable_keys() == 1
+    assert keys.remaining_today() == 20
+    assert all(keys.try_acquire() == "b" for _ in range(3))
+
+
+def test_daily_quota_error_exhausts_key():
+    keys = KeyScheduler(["a"], rpm_limit=100, rpd_limit=20, cooldown_seconds=0)
+    keys.report_rate_limited("a", "Quota exceeded for GenerateRequestsPerDayPerProjectPerModel")
+    assert keys.remaining_today() == 0
+    assert keys.try_acquire() is None
+
+
+def test_acquire_waits_for_minute_token():
+    keys = KeyScheduler(["a"], rpm_limit=600, rpd_limit=20)  # One token every 0.1s
+    keys.try_acquire()
+    keys._states[0].tokens = 0
+    assert asyncio.run(keys.acquire(max_wait=1)) == "a"
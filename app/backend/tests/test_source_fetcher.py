@@ -0,0 +1,35 @@
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+import source_fetcher
+
+
+async def with_server(check):
+    async def page(request):
+        return web.Response(text="<p>Hello.</p>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/page", page)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        await check(f"http://127.0.0.1:{port}/page")
+    finally:
+        await source_fetcher.close_session()
+        await runner.cleanup()
+
+
+def test_body_error_after_headers_records_one_outcome():
+    async def check(url):
+        with pytest.raises(aiohttp.ClientPayloadError):
+            async with source_fetcher._tracked_get(url):
+                raise aiohttp.ClientPayloadError("body cut off")
+        host = source_fetcher.domain_health._host(url)
+        assert list(host.outcomes) == [True]
+        assert host.consecutive_failures == 0
+
+    asyncio.run(with_server(check))
@@ -0,0 +1,75 @@
+import json
+import numpy as np
+from voice_audio import (AudioCoalescer, VoiceActivityDetector, VoiceSessionStats, VoiceStats,
+                         pcm_bytes, realtime_input_message)
+
+RNG = np.random.default_rng(0)
+
+
+def noise(seconds: float, rms: float) -> bytes:
+    return RNG.normal(0, rms, int(16000 * seconds)).astype('<i2').tobytes()
+
+
+def run(vad: VoiceActivityDetector, pcm: bytes, chunk_ms: float = 100):
+    chunk = pcm_bytes(chunk_ms)
+    results = [vad.process(pcm[i:i + chunk]) for i in range(0, len(pcm), chunk)]
+    return b"".join(out for out, _ in results), sum(ended for _, ended in results)
+
+
+def test_realtime_input_message_roundtrip():
+    message = json.loads(realtime_input_message(b"\x01\x02"))
+    assert message["realtimeInput"]["mediaChunks"][0]["data"] == "AQI="
+
+
+def test_coalescer_flushes_at_size():
+    coalescer = AudioCoalescer(flush_bytes=pcm_bytes(200), max_delay_seconds=1)
+    assert coalescer.add(b"\0" * pcm_bytes(100)) is None
+    assert coalescer.time_left() is not None
+    assert len(coalescer.add(b"\0" * pcm_bytes(100))) == pcm_bytes(200)
+    assert coalescer.time_left() is None
+
+
+def test_vad_drops_silence_and_ends_utterance():
+    vad = VoiceActivityDetector(min_rms=300, hangover_ms=200, preroll_ms=100)
+    out, ended = run(vad, noise(1, 30) + noise(1, 3000) + noise(1, 30))
+    assert ended == 1
+    assert pcm_bytes(1000) <= len(out) < pcm_bytes(1500)
+    assert vad.stats.speech_segments == 1
+
+
+def test_vad_keeps_preroll_before_speech():
+    vad = VoiceActivityDetector(min_rms=300, hangover_ms=200, preroll_ms=100)
+    out, _ = run(vad, noise(1, 30) + noise(0.5, 3000))
+    assert len(out) == pcm_bytes(600)
+
+
+def test_vad_suppresses_steady_loud_noise():
+    vad = VoiceActivityDetector(min_rms=300, hangover_ms=200, preroll_ms=100)
+    run(vad, noise(8, 600))  # A fan above min_rms: counted as speech until the floor catches up
+    out, _ = run(vad, noise(2, 600))
+    assert out == b""
+    out, _ = run(vad, noise(0.5, 5000))
+    assert len(out) > 0  # Speech over the noise still gets through
+
+
+def test_vad_floor_stays_low_through_speech_with_pauses():
+    t = np.arange(16000 * 10) / 16000
+    syllables = (np.sin(2 * np.pi * 3 * t) > -0.2).astype(float)
+    speech = (RNG.normal(0, 3000, t.size) * syllables + RNG.normal(0, 50, t.size)).astype('<i2').tobytes()
+    vad = VoiceActivityDetector(min_rms=300, hangover_ms=200, preroll_ms=100)
+    out, _ = run(vad, speech)
+    assert vad.noise_floor < 300
+    assert len(out) == len(speech)
+
+
+def test_voice_stats_totals_live_and_closed_sessions():
+    stats = VoiceStats()
+    first = stats.open(binary=True)
+    second = stats.open(binary=False)
+    first.client_frames, second.client_frames = 3, 2
+    first.upstream_messages = 1
+    stats.close(first)
+    totals = stats.stats()
+    assert totals["sessions"] == 2 and totals["active"] == 1 and totals["binary_sessions"] == 1
+    assert totals["client_frames"] == 5
+    assert "json" in VoiceSessionStats(binary=False).summary()
@@ -0,0 +1,241 @@
+"""
+Audio plumbing for /ws/live-session.
+
+Clients used to send every 100ms microphone chunk as JSON with a base64
+"audio" field, and each one was re-wrapped in a realtimeInput dict and
+json.dumps'd for Gemini; replies came back the same way. A client that
+connects with ?binary=1 instead sends raw 16kHz PCM in binary frames and
+receives raw 24kHz PCM in binary frames (everything else stays JSON text).
+
+Either way, incoming PCM first goes through an energy-based
+VoiceActivityDetector, which drops silence between utterances (keeping a short
+pre-roll before speech and a hangover after it) and reports where speech ends
+so the session can send audioStreamEnd. The noise floor follows quiet frames,
+and also rises toward the quietest frame of the last few seconds, so steady
+noise louder than the speech threshold (a fan, a hum) stops counting as speech
+after a few seconds instead of streaming forever. What is left goes through an
+AudioCoalescer: small chunks are buffered until AUDIO_COALESCE_MS of audio is
+waiting (or the oldest byte has waited AUDIO_COALESCE_MAX_DELAY_MS) and sent
+upstream as one message, built from a fixed template around a single base64
+encode.
+"""
+import base64
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+import numpy as np
+
+INPUT_SAMPLE_RATE = 16000  # Gemini Live expects 16kHz mono 16-bit PCM
+BYTES_PER_SAMPLE = 2
+
+_REALTIME_INPUT_TEMPLATE = '{"realtimeInput":{"mediaChunks":[{"data":"%s","mimeType":"audio/pcm;rate=16000"}]}}'
+AUDIO_STREAM_END_MESSAGE = '{"realtimeInput":{"audioStreamEnd":true}}'  # Lets Gemini flush the turn without trailing silence
+
+VAD_FRAME_MS = 20
+VAD_NOISE_RATIO = 3.0  # A frame is speech when louder than this multiple of the noise floor (and min_rms)
+VAD_NOISE_ADAPT = 0.05  # How quickly the noise floor follows quiet frames
+VAD_MIN_BLOCK_FRAMES = 25  # Minimum statistics: quietest frame per 0.5s block...
+VAD_MIN_WINDOW_BLOCKS = 8  # ...over the last 4s
+VAD_FLOOR_RISE = 0.01  # How quickly the noise floor rises toward that minimum
+
+
+def pcm_bytes(milliseconds: float) -> int:
+    """Size of this much 16kHz input audio, rounded down to whole samples."""
+    return int(INPUT_SAMPLE_RATE * milliseconds / 1000) * BYTES_PER_SAMPLE
+
+
+def realtime_input_message(pcm: bytes) -> str:
+    """The upstream realtimeInput message for a PCM chunk (base64 output needs no JSON escaping)."""
+    return _REALTIME_INPUT_TEMPLATE % base64.b64encode(pcm).decode('ascii')
+
+
+class AudioCoalescer:
+    def __init__(self, flush_bytes: int, max_delay_seconds: float):
+        self.flush_bytes = max(flush_bytes, BYTES_PER_SAMPLE)
+        self.max_delay_seconds = max_delay_seconds
+        self._buffer = bytearray()
+        self._first_at = 0.0
+
+    def add(self, pcm: bytes) -> Optional[bytes]:
+        """Buffer a chunk; returns the buffered audio once there is enough to send."""
+        if not self._buffer:
+            self._first_at = time.monotonic()
+        self._buffer += pcm
+        if len(self._buffer) >= self.flush_bytes:
+            return self.take()
+        return None
+
+    def time_left(self) -> Optional[float]:
+        """Seconds until the buffered audio must be sent anyway (None = nothing buffered)."""
+        if not self._buffer:
+            return None
+        return max(0.0, self._first_at + self.max_delay_seconds - time.monotonic())
+
+    def take(self) -> bytes:
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return chunk
+
+
+class VoiceActivityDetector:
+    def __init__(self, min_rms: float, hangover_ms: float, preroll_ms: float,
+                 stats: Optional["VoiceSessionStats"] = None):
+        self.min_rms = min_rms
+        self.frame_bytes = pcm_bytes(VAD_FRAME_MS)
+        self.hangover_frames = max(1, math.ceil(hangover_ms / VAD_FRAME_MS))
+        self.stats = stats or VoiceSessionStats(binary=False)
+        self.noise_floor = 0.0
+        self.speaking = False
+        self._quiet_frames = 0
+        self._pending = bytearray()
+        self._preroll: Deque[bytes] = deque(maxlen=int(preroll_ms // VAD_FRAME_MS))
+        self._block_min = math.inf
+        self._block_frames = 0
+        self._minima: Deque[float] = deque(maxlen=VAD_MIN_WINDOW_BLOCKS)
+        self._window_min = 0.0
+
+    def _track_minimum(self, level: float):
+        """
+        Minimum statistics: even real speech has quiet gaps within a few seconds, so
+        a window minimum well above the floor means the "speech" is steady noise.
+        """
+        self._block_min = min(self._block_min, level)
+        self._block_frames += 1
+        if self._block_frames == VAD_MIN_BLOCK_FRAMES:
+            self._minima.append(self._block_min)
+            self._block_min = math.inf
+            self._block_frames = 0
+            if len(self._minima) == VAD_MIN_WINDOW_BLOCKS:
+                self._window_min = min(self._minima)
+        if self._window_min > self.noise_floor:
+            self.noise_floor += VAD_FLOOR_RISE * (self._window_min - self.noise_floor)
+
+    def process(self, pcm: bytes) -> Tuple[bytes, bool]:
+        """
+        Returns the audio worth forwarding and whether an utterance ended in it.
+        Input is judged in 20ms frames; a trailing partial frame waits for the next chunk.
+        """
+        self._pending += pcm
+        usable = len(self._pending) - len(self._pending) % self.frame_bytes
+        if not usable:
+            return b"", False
+        block = bytes(self._pending[:usable])
+        del self._pending[:usable]
+
+        samples = np.frombuffer(block, dtype='<i2').astype(np.float32).reshape(-1, self.frame_bytes // BYTES_PER_SAMPLE)
+        levels = np.sqrt(np.mean(samples * samples, axis=1))
+
+        out = bytearray()
+        ended = False
+        for i, level in enumerate(levels.tolist()):
+            frame = block[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            self.stats.vad_frames += 1
+            self._track_minimum(level)
+            if level >= max(self.min_rms, self.noise_floor * VAD_NOISE_RATIO):
+                if not self.speaking:
+                    self.speaking = True
+                    if ended:
+                        ended = False  # Resumed within the same chunk: one continuous utterance
+                    else:
+                        self.stats.speech_segments += 1
+                    # Send the quiet lead-in too, so the first syllable isn't clipped
+                    for quiet in self._preroll:
+                        out += quiet
+                    self.stats.vad_suppressed_frames -= len(self._preroll)
+                    self._preroll.clear()
+                self._quiet_frames = 0
+                out += frame
+                continue
+
+            self.noise_floor += VAD_NOISE_ADAPT * (level - self.noise_floor)
+            if self.speaking:
+                # Hangover: keep sending for a while so word endings and short pauses survive
+                out += frame
+                self._quiet_frames += 1
+                if self._quiet_frames >= self.hangover_frames:
+                    self.speaking = False
+                    ended = True
+            else:
+                self._preroll.append(frame)
+                self.stats.vad_suppressed_frames += 1
+        return bytes(out), ended
+
+
+class VoiceSessionStats:
+    def __init__(self, binary: bool):
+        self.binary = binary
+        self.started = time.monotonic()
+        self.client_frames = 0
+        self.client_bytes = 0
+        self.upstream_messages = 0
+        self.downstream_frames = 0
+        self.downstream_bytes = 0
+        self.tool_calls = 0
+        self.tool_timeouts = 0
+        self.tool_cancelled = 0
+        self.vad_frames = 0
+        self.vad_suppressed_frames = 0
+        self.speech_segments = 0
+
+    def summary(self) -> str:
+        seconds = self.client_bytes / (INPUT_SAMPLE_RATE * BYTES_PER_SAMPLE)
+        suppressed = f", {_percent(self.vad_suppressed_frames, self.vad_frames)}% silence dropped" if self.vad_frames else ""
+        return (f"{'binary' if self.binary else 'json'}, {seconds:.1f}s audio in "
+                f"{self.client_frames} frames -> {self.upstream_messages} upstream messages{suppressed}, "
+                f"{self.speech_segments} utterances, {self.downstream_frames} frames back, {self.tool_calls} checks")
+
+
+class VoiceStats:
+    """Totals across voice sessions (finished and live), for /api/voice/stats."""
+
+    COUNTERS = ("client_frames", "client_bytes", "upstream_messages", "downstream_frames", "downstream_bytes",
+                "tool_calls", "tool_timeouts", "tool_cancelled", "vad_frames", "vad_suppressed_frames", "speech_segments")
+
+    def __init__(self):
+        self.sessions = 0
+        self.binary_sessions = 0
+        self._active: Set[VoiceSessionStats] = set()
+        self._closed = dict.fromkeys(self.COUNTERS, 0)
+
+    def open(self, binary: bool) -> VoiceSessionStats:
+        session = VoiceSessionStats(binary)
+        self.sessions += 1
+        if binary:
+            self.binary_sessions += 1
+        self._active.add(session)
+        return session
+
+    def close(self, session: VoiceSessionStats):
+        self._active.discard(session)
+        for name in self.COUNTERS:
+            self._closed[name] += getattr(session, name)
+
+    def stats(self) -> Dict[str, Any]:
+        totals = dict(self._closed)
+        for session in self._active:
+            for name in self.COUNTERS:
+                totals[name] += getattr(session, name)
+        return {
+            "sessions": self.sessions,
+            "active": len(self._active),
+            "binary_sessions": self.binary_sessions,
+            "client_frames": totals["client_frames"],
+            "client_audio_seconds": round(totals["client_bytes"] / (INPUT_SAMPLE_RATE * BYTES_PER_SAMPLE), 1),
+            "upstream_messages": totals["upstream_messages"],
+            "frames_per_upstream_message": (round(totals["client_frames"] / totals["upstream_messages"], 2)
+                                            if totals["upstream_messages"] else 0),
+            "downstream_frames": totals["downstream_frames"],
+            "downstream_bytes": totals["downstream_bytes"],
+            "tool_calls": totals["tool_calls"],
+            "tool_timeouts": totals["tool_timeouts"],
+            "tool_cancelled": totals["tool_cancelled"],
+            "vad_frames": totals["vad_frames"],
+            "vad_suppressed_frames": totals["vad_suppressed_frames"],
+            "vad_suppressed_percent": _percent(totals["vad_suppressed_frames"], totals["vad_frames"]),
+            "speech_segments": totals["speech_segments"]
+        }
+
+
+def _percent(part: int, whole: int) -> float:
+    return round(100 * part / whole, 1) if whole else 0.0
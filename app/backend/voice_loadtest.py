@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Load test for /ws/live-session, fully offline.
+
+Starts a local stand-in for the Gemini Live websocket (setupComplete after a
+configurable delay, audio echoed back as model audio, scripted verify_fact
+toolCalls), runs the backend against it in a child process with a scripted
+check agent, and opens N simulated clients that stream PCM in real time.
+
+Reports:
+- session start (client connect -> "connected") percentiles
+- audio round trip: client frame sent -> same audio back at the client (includes
+  VAD, coalescing and the relay in both directions)
+- relay jitter: RFC 3550 interarrival jitter of that round trip, per session
+- tool-call turnaround: toolCall sent by the fake Gemini -> toolResponse received
+- backend CPU per session and per session-second (Linux /proc), plus the
+  backend's own /api/voice/stats
+
+Usage:
+    python voice_loadtest.py --clients 20 --duration 30
+    python voice_loadtest.py --clients 50 --pcm recording.raw --json
+    python voice_loadtest.py --url ws://127.0.0.1:8000/ws/live-session   # running backend, no fake check agent
+
+--pcm takes raw 16kHz mono 16-bit little-endian audio; without it a synthetic
+talk/pause pattern is used. Outgoing frames carry a small marker in each 20ms
+subframe so echoed audio can be matched to when it was sent.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+import aiohttp
+import numpy as np
+import websockets
+
+SAMPLE_RATE = 16000
+SUBFRAME_BYTES = 640  # 20ms at 16kHz; the backend's VAD forwards whole 20ms frames, so markers stay aligned
+MARKER = (7, -7, 7, -7)  # Quiet enough not to change the VAD's view of a frame
+_ECHO_TEMPLATE = '{"serverContent":{"modelTurn":{"parts":[{"inlineData":{"mimeType":"audio/pcm;rate=24000","data":"%s"}}]}}}'
+
+
+# --- FAKE GEMINI LIVE ---
+class FakeGeminiLive:
+    def __init__(self, setup_ms: float, tool_every_seconds: float):
+        self.setup_seconds = setup_ms / 1000
+        self.tool_every_seconds = tool_every_seconds
+        self.connections = 0
+        self.audio_messages = 0
+        self.stream_ends = 0
+        self.tool_turnaround: List[float] = []
+        self.tools_unanswered = 0
+
+    async def handler(self, ws):
+        self.connections += 1
+        pending_tools: Dict[str, float] = {}
+        tool_task: Optional[asyncio.Task] = None
+
+        async def call_tools():
+            calls = 0
+            while True:
+                await asyncio.sleep(self.tool_every_seconds)
+                calls += 1
+                call_id = f"{id(ws)}-{calls}"
+                pending_tools[call_id] = time.monotonic()
+                await ws.send(json.dumps({"toolCall": {"functionCalls": [{
+                    "name": "verify_fact", "id": call_id, "args": {"query": f"load test claim {calls}"}
+                }]}}))
+
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                realtime = data.get("realtimeInput")
+                if realtime is not None:
+                    if realtime.get("audioStreamEnd"):
+                        self.stream_ends += 1
+                        continue
+                    self.audio_messages += 1
+                    # Scripted tool calls start once a client is actually attached (pooled connections idle first)
+                    if tool_task is None and self.tool_every_seconds > 0:
+                        tool_task = asyncio.create_task(call_tools())
+                    for chunk in realtime.get("mediaChunks", []):
+                        await ws.send(_ECHO_TEMPLATE % chunk["data"])
+                elif "setup" in data:
+                    await asyncio.sleep(self.setup_seconds)
+                    await ws.send(json.dumps({"setupComplete": {}}))
+                elif "toolResponse" in data:
+                    now = time.monotonic()
+                    for response in data["toolResponse"].get("functionResponses", []):
+                        sent = pending_tools.pop(response.get("id"), None)
+                        if sent is not None:
+                            self.tool_turnaround.append(now - sent)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            if tool_task is not None:
+                tool_task.cancel()
+            self.tools_unanswered += len(pending_tools)
+
+
+# --- BACKEND UNDER TEST ---
+def serve_backend(port: int, check_ms: float):
+    """Child process: the real app, with a scripted check agent so no Google/Groq calls are made."""
+    import uvicorn
+    import main
+
+    async def scripted_check(query: str, extract_snippets: bool = True) -> Dict[str, Any]:
+        await asyncio.sleep(check_ms / 1000)
+        return {
+            "verdict": "REAL",
+            "confidence": 0.9,
+            "explanation": f"Scripted load-test verdict for '{query}'.",
+            "sources": [{"title": "Load test", "uri": "http://127.0.0.1/loadtest"}]
+        }
+
+    main.run_check_agent = scripted_check
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None  # Not Linux
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def wait_for_backend(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as http:
+        while True:
+            try:
+                async with http.get(base_url) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("backend did not start")
+            await asyncio.sleep(0.2)
+
+
+async def prime_session(url: str):
+    """Open and close one session: the backend's upstream pool only warms once voice is in use."""
+    async with websockets.connect(url, max_size=None) as ws:
+        while json.loads(await ws.recv()).get("type") != "connected":
+            pass
+
+
+async def fetch_json(url: str) -> Optional[Dict[str, Any]]:
+    try:
+        async with aiohttp.ClientSession() as http:
+            async with http.get(url) as response:
+                return await response.json()
+    except aiohttp.ClientError:
+        return None
+
+
+# --- CLIENT AUDIO ---
+def synthetic_audio(seconds: float = 10.0) -> bytes:
+    """Alternating 1.5s of voiced tone and 1s of low room noise, so VAD has something to do."""
+    rng = np.random.default_rng(0)
+    pieces = []
+    while sum(len(p) for p in pieces) < seconds * SAMPLE_RATE:
+        t = np.arange(int(1.5 * SAMPLE_RATE)) / SAMPLE_RATE
+        envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 3 * t)
+        pieces.append(3000 * envelope * np.sin(2 * np.pi * 180 * t) + rng.normal(0, 60, len(t)))
+        pieces.append(rng.normal(0, 60, SAMPLE_RATE))
+    return np.clip(np.concatenate(pieces), -32768, 32767).astype('<i2').tobytes()
+
+
+def stamp(chunk: bytearray, seq: int):
+    """Write MARKER + a 24-bit sequence number into the first samples of a 20ms subframe."""
+    samples = MARKER + (seq & 0xFF, (seq >> 8) & 0xFF, (seq >> 16) & 0xFF)
+    chunk[:len(samples) * 2] = np.array(samples, dtype='<i2').tobytes()
+
+
+def read_stamps(data: bytes) -> List[int]:
+    usable = len(data) - len(data) % SUBFRAME_BYTES
+    if not usable:
+        return []
+    heads = np.frombuffer(data[:usable], dtype='<i2').reshape(-1, SUBFRAME_BYTES // 2)[:, :7]
+    marked = heads[np.all(heads[:, :4] == MARKER, axis=1)]
+    return (marked[:, 4].astype(np.int64) | (marked[:, 5].astype(np.int64) << 8)
+            | (marked[:, 6].astype(np.int64) << 16)).tolist()
+
+
+# --- SIMULATED CLIENTS ---
+class ClientResult:
+    def __init__(self):
+        self.connect_seconds: Optional[float] = None
+        self.round_trips: List[float] = []
+        self.jitter = 0.0
+        self.frames_sent = 0
+        self.agent_results = 0
+        self.error: Optional[str] = None
+
+
+async def run_client(url: str, audio: bytes, args: argparse.Namespace, start_delay: float) -> ClientResult:
+    result = ClientResult()
+    await asyncio.sleep(start_delay)
+    chunk_bytes = SUBFRAME_BYTES * max(1, round(args.chunk_ms / 20))
+    sent_at: Dict[int, float] = {}
+    last_transit: Optional[float] = None
+
+    def on_audio(data: bytes):
+        nonlocal last_transit
+        now = time.monotonic()
+        for seq in read_stamps(data):
+            sent = sent_at.pop(seq, None)
+            if sent is None:
+                continue
+            transit = now - sent
+            result.round_trips.append(transit)
+            if last_transit is not None:
+                result.jitter += (abs(transit - last_transit) - result.jitter) / 16
+            last_transit = transit
+
+    async def receive(ws):
+        async for message in ws:
+            if isinstance(message, bytes):
+                on_audio(message)
+                continue
+            event = json.loads(message)
+            if event.get("type") == "audio":
+                on_audio(base64.b64decode(event["audio"]))
+            elif event.get("type") == "agent_result":
+                result.agent_results += 1
+
+    opened = time.monotonic()
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            while json.loads(await ws.recv()).get("type") != "connected":
+                pass
+            result.connect_seconds = time.monotonic() - opened
+            receiver = asyncio.create_task(receive(ws))
+
+            seq = 0
+            offset = 0
+            next_send = time.monotonic()
+            stop_at = next_send + args.duration
+            while time.monotonic() < stop_at:
+                chunk = bytearray(audio[offset:offset + chunk_bytes])
+                offset = (offset + chunk_bytes) % (len(audio) - chunk_bytes)
+                now = time.monotonic()
+                for start in range(0, len(chunk), SUBFRAME_BYTES):
+                    view = memoryview(chunk)[start:start + SUBFRAME_BYTES]
+                    stamp(view, seq)
+                    sent_at[seq] = now
+                    seq += 1
+                if args.json_audio:
+                    await ws.send(json.dumps({"type": "audio", "audio": base64.b64encode(chunk).decode('ascii')}))
+                else:
+                    await ws.send(bytes(chunk))
+                result.frames_sent += 1
+                # Real-time pacing, like a microphone
+                next_send += args.chunk_ms / 1000
+                await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+
+            await asyncio.sleep(args.drain)
+            receiver.cancel()
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+# --- REPORT ---
+def percentiles(samples: List[float], scale: float = 1000) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    values = np.asarray(samples) * scale
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"p50": round(p50, 1), "p90": round(p90, 1), "p99": round(p99, 1), "max": round(values.max(), 1)}
+
+
+def describe(name: str, stats: Dict[str, Optional[float]], unit: str = "ms", count: Optional[int] = None) -> str:
+    if stats["p50"] is None:
+        return f"{name}: no samples"
+    suffix = f" ({count} samples)" if count is not None else ""
+    return (f"{name}: p50 {stats['p50']}{unit}, p90 {stats['p90']}{unit}, "
+            f"p99 {stats['p99']}{unit}, max {stats['max']}{unit}{suffix}")
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    audio = synthetic_audio()
+    if args.pcm:
+        with open(args.pcm, 'rb') as pcm:
+            audio = pcm.read()
+        audio = audio[:len(audio) - len(audio) % SUBFRAME_BYTES]
+
+    fake = None
+    backend = None
+    fake_server = None
+    url = args.url
+    if url is None:
+        fake = FakeGeminiLive(args.setup_ms, args.tool_every)
+        fake_port = free_port()
+        fake_server = await websockets.serve(fake.handler, "127.0.0.1", fake_port, max_size=None)
+        port = free_port()
+        env = {
+            **os.environ,
+            "GEMINI_LIVE_URL": f"ws://127.0.0.1:{fake_port}",
+            "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "loadtest"),
+            "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "loadtest"),
+            "PARSE_WORKERS": os.environ.get("PARSE_WORKERS", "0")
+        }
+        backend = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve-backend", str(port), "--check-ms", str(args.check_ms)],
+            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+            stdout=None if args.verbose else subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL
+        )
+        url = f"ws://127.0.0.1:{port}/ws/live-session"
+    base_url = url.replace("ws://", "http://").replace("wss://", "https://").split("/ws/")[0]
+
+    try:
+        await wait_for_backend(base_url + "/")
+        if not args.json_audio:
+            url += "?binary=1"
+        if not args.cold:
+            await prime_session(url)
+        await asyncio.sleep(args.warmup)  # Let the upstream pool fill
+
+        cpu_before = process_cpu_seconds(backend.pid) if backend else None
+        harness_cpu_before = time.process_time()
+        started = time.monotonic()
+        clients = await asyncio.gather(*(
+            run_client(url, audio, args, args.ramp * i / max(1, args.clients)) for i in range(args.clients)
+        ))
+        elapsed = time.monotonic() - started
+        cpu_after = process_cpu_seconds(backend.pid) if backend else None
+        voice_stats = await fetch_json(base_url + "/api/voice/stats")
+    finally:
+        if backend is not None:
+            backend.terminate()
+            backend.wait()
+        if fake_server is not None:
+            fake_server.close()
+
+    ok = [c for c in clients if c.error is None]
+    round_trips = [rt for c in ok for rt in c.round_trips]
+    session_seconds = args.duration * len(ok)
+    report: Dict[str, Any] = {
+        "clients": args.clients,
+        "failed": len(clients) - len(ok),
+        "errors": sorted({c.error for c in clients if c.error})[:5],
+        "duration_seconds": args.duration,
+        "transport": "json" if args.json_audio else "binary",
+        "chunk_ms": args.chunk_ms,
+        "session_start_ms": percentiles([c.connect_seconds for c in ok]),
+        "audio_round_trip_ms": percentiles(round_trips),
+        "audio_round_trip_samples": len(round_trips),
+        "relay_jitter_ms": percentiles([c.jitter for c in ok if c.round_trips]),
+        "agent_results": sum(c.agent_results for c in ok),
+        "harness_cpu_seconds": round(time.process_time() - harness_cpu_before, 2),
+        "wall_seconds": round(elapsed, 1),
+        "backend_voice_stats": voice_stats
+    }
+    if fake is not None:
+        report["tool_turnaround_ms"] = percentiles(fake.tool_turnaround)
+        report["tool_calls_answered"] = len(fake.tool_turnaround)
+        report["tool_calls_unanswered"] = fake.tools_unanswered
+        report["upstream_audio_messages"] = fake.audio_messages
+        report["upstream_stream_ends"] = fake.stream_ends
+    if cpu_before is not None and cpu_after is not None:
+        cpu = cpu_after - cpu_before
+        report["backend_cpu_seconds"] = round(cpu, 2)
+        report["backend_cpu_percent_of_core"] = round(100 * cpu / elapsed, 1)
+        report["backend_cpu_ms_per_session"] = round(1000 * cpu / len(ok), 1) if ok else None
+        report["backend_cpu_ms_per_session_second"] = round(1000 * cpu / session_seconds, 2) if session_seconds else None
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print("=" * 60)
+    print(f"🎤 VOICE LOAD TEST: {report['clients']} clients × {report['duration_seconds']:g}s "
+          f"({report['transport']} audio, {report['chunk_ms']:g}ms chunks)")
+    print("=" * 60)
+    print(f"Sessions: {report['clients'] - report['failed']} ok, {report['failed']} failed")
+    for error in report["errors"]:
+        print(f"   ❌ {error}")
+    print(describe("Session start", report["session_start_ms"]))
+    print(describe("Audio round trip", report["audio_round_trip_ms"], count=report["audio_round_trip_samples"]))
+    print(describe("Relay jitter (per session)", report["relay_jitter_ms"]))
+    if "tool_turnaround_ms" in report:
+        print(describe("Tool-call turnaround", report["tool_turnaround_ms"], count=report["tool_calls_answered"]))
+        print(f"Tool calls unanswered at close: {report['tool_calls_unanswered']}")
+        print(f"Upstream: {report['upstream_audio_messages']} audio messages, {report['upstream_stream_ends']} audioStreamEnd")
+    if "backend_cpu_seconds" in report:
+        print(f"Backend CPU: {report['backend_cpu_seconds']}s ({report['backend_cpu_percent_of_core']}% of one core), "
+              f"{report['backend_cpu_ms_per_session']}ms per session, "
+              f"{report['backend_cpu_ms_per_session_second']}ms per session-second")
+    print(f"Harness CPU: {report['harness_cpu_seconds']}s over {report['wall_seconds']}s")
+    stats = report.get("backend_voice_stats")
+    if stats:
+        print(f"Backend: {stats.get('upstream_messages')} upstream messages for {stats.get('client_frames')} client frames, "
+              f"{stats.get('vad_suppressed_percent')}% silence dropped, "
+              f"pool hit rate {stats.get('upstream_pool', {}).get('hit_rate')}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline load test for /ws/live-session")
+    parser.add_argument("--clients", type=int, default=10, help="simulated voice clients")
+    parser.add_argument("--duration", type=float, default=20, help="seconds each client streams audio")
+    parser.add_argument("--ramp", type=float, default=2, help="seconds over which clients connect")
+    parser.add_argument("--chunk-ms", type=float, default=100, help="client frame size (multiple of 20ms)")
+    parser.add_argument("--json-audio", action="store_true", help="send base64 JSON audio instead of binary frames")
+    parser.add_argument("--pcm", help="raw 16kHz mono s16le file to stream (looped)")
+    parser.add_argument("--setup-ms", type=float, default=300, help="fake Gemini delay before setupComplete")
+    parser.add_argument("--tool-every", type=float, default=5, help="seconds between scripted toolCalls per session (0 = none)")
+    parser.add_argument("--check-ms", type=float, default=800, help="scripted check agent latency")
+    parser.add_argument("--warmup", type=float, default=1, help="seconds to wait after the backend is up")
+    parser.add_argument("--cold", action="store_true", help="don't open a priming session first (measures pool warm-up)")
+    parser.add_argument("--drain", type=float, default=1, help="seconds to wait for echoes after streaming stops")
+    parser.add_argument("--url", help="test an already running backend instead (its check agent is not scripted)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show backend logs")
+    parser.add_argument("--serve-backend", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.serve_backend:
+        serve_backend(args.serve_backend, args.check_ms)
+    else:
+        report = asyncio.run(run_load_test(args))
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report)
@@ -2,6 +2,7 @@
 
 // POINT TO YOUR FASTAPI BACKEND
 const API_BASE = 'http://localhost:8000/api';
+const BATCH_MAX_CLAIMS = 50; // Backend's default BATCH_MAX_CLAIMS; bigger scans are sent in several batches
 
 // Initialize Context Menus
 chrome.runtime.onInstalled.addListener(() => {
@@ -99,72 +100,30 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
 // --- CORE VERIFICATION FLOW (MATCHING MAIN.PY) ---
 async function runVerificationFlow(text, tabId) {
   try {
-    // STEP 1: Main Agent (like main.py)
+    // Main Agent -> Check Agent -> Synthesis run server-side in one call
     if (tabId) {
       await sendMessageSafely(tabId, {
         action: 'status_update',
-        status: 'thinking',
-        message: '🤖 Main Agent analyzing...'
+        status: 'checking',
+        message: '🔍 Verifying with Main Agent + Check Agent...'
       });
     }
 
-    const mainResponse = await fetch(`${API_BASE}/main-agent`, {
+    const verifyResponse = await fetch(`${API_BASE}/verify`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ userText: text })
     });
 
-    if (!mainResponse.ok) {
-      throw new Error(`Main Agent failed: ${mainResponse.status}`);
+    if (!verifyResponse.ok) {
+      throw new Error(`Verification failed: ${verifyResponse.status}`);
     }
     
-    const plan = await mainResponse.json();
-
-    if (plan.action === "DELEGATE_TO_CHECKER") {
-      // STEP 2: Check Agent (like main.py)
-      if (tabId) {
-        await sendMessageSafely(tabId, {
-          action: 'status_update',
-          status: 'checking',
-          message: '🔍 Check Agent verifying...'
-        });
-      }
-
-      const checkResponse = await fetch(`${API_BASE}/check-agent`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ query: plan.checker_query || text })
-      });
-
-      if (!checkResponse.ok) {
-        throw new Error(`Check Agent failed: ${checkResponse.status}`);
-      }
-      
-      const checkResult = await checkResponse.json();
-
-      // STEP 3: Synthesis (like main.py)
-      if (tabId) {
-        await sendMessageSafely(tabId, {
-          action: 'status_update',
-          status: 'synthesizing',
-          message: '✨ Synthesizing response...'
-        });
-      }
+    const result = await verifyResponse.json();
+    const plan = result.plan || {};
 
-      const synthesisResponse = await fetch(`${API_BASE}/synthesis`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          userQuery: text,
-          checkResult: checkResult
-        })
-      });
-
-      if (!synthesisResponse.ok) {
-        throw new Error(`Synthesis failed: ${synthesisResponse.status}`);
-      }
-      
-      const synthesisResult = await synthesisResponse.json();
+    if (result.action === "DELEGATE_TO_CHECKER") {
+      const checkResult = result.check || {};
 
       // Build final result
       const finalPacket = {
@@ -172,7 +131,7 @@ async function runVerificationFlow(text, tabId) {
         verdict: checkResult.verdict || 'UNCERTAIN',
         confidence: checkResult.confidence || 0.5,
         sources: checkResult.sources || [],
-        analysis: synthesisResult.text || 'Analysis completed.'
+        analysis: result.text || 'Analysis completed.'
       };
 
       // Send to UI
@@ -185,9 +144,9 @@ async function runVerificationFlow(text, tabId) {
 
       return { success: true, data: finalPacket };
 
-    } else if (plan.action === "DIRECT_REPLY") {
+    } else if (result.action === "DIRECT_REPLY") {
       // Direct reply from main agent
-      const responseText = plan.reply_text || "I can help you verify information.";
+      const responseText = result.text || plan.reply_text || "I can help you verify information.";
 
       if (tabId) {
         await sendMessageSafely(tabId, {
@@ -247,36 +206,49 @@ async function runPageScan(pageText, tabId) {
       });
     }
 
-    // Check each claim
-    const results = await Promise.all(claims.map(async (claim, index) => {
-      try {
-        const res = await fetch(`${API_BASE}/check-agent`, {
+    // Check the claims in batches (server de-duplicates and limits concurrency)
+    let results = [];
+    try {
+      const trimmed = claims.map(claim => claim.trim());
+      for (let start = 0; start < trimmed.length; start += BATCH_MAX_CLAIMS) {
+        const chunk = trimmed.slice(start, start + BATCH_MAX_CLAIMS);
+        const res = await fetch(`${API_BASE}/check-agent/batch`, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({ query: claim.trim() })
+          body: JSON.stringify({ claims: chunk })
         });
         
         if (!res.ok) throw new Error('Check failed');
-        const result = await res.json();
+        const batch = await res.json();
         
-        return {
-          claim: claim.trim(),
-          verdict: result.verdict || 'UNCERTAIN',
-          confidence: result.confidence || 0.5,
-          explanation: result.explanation || 'No explanation available',
-          sources: result.sources || []
-        };
-      } catch (err) {
-        console.error(`Error checking claim ${index + 1}:`, err);
-        return {
-          claim: claim.trim(),
-          verdict: 'UNCERTAIN',
-          confidence: 0,
-          explanation: 'Failed to verify this claim.',
-          sources: []
-        };
+        // Claims past a lower server limit come back counted in "skipped", not in results
+        chunk.forEach((claim, i) => {
+          const result = batch.results[i];
+          results.push(result ? {
+            claim: result.claim,
+            verdict: result.verdict || 'UNCERTAIN',
+            confidence: result.confidence || 0.5,
+            explanation: result.explanation || 'No explanation available',
+            sources: result.sources || []
+          } : {
+            claim,
+            verdict: 'UNCERTAIN',
+            confidence: 0,
+            explanation: 'Not checked: the server skipped this claim (batch limit).',
+            sources: []
+          });
+        });
       }
-    }));
+    } catch (err) {
+      console.error('Error checking claims:', err);
+      results = claims.map(claim => ({
+        claim: claim.trim(),
+        verdict: 'UNCERTAIN',
+        confidence: 0,
+        explanation: 'Failed to verify this claim.',
+        sources: []
+      }));
+    }
 
     // Send results
     if (tabId) {
@@ -4,7 +4,7 @@ import ReactMarkdown from 'react-markdown';
 import { Mic, Send, StopCircle, Activity, ShieldCheck, Bot, Terminal, User, AlertTriangle, Loader2, MicOff, ImageIcon, X } from 'lucide-react';
 
 // --- AUDIO UTILS (Inline for simplicity) ---
-function floatTo16BitPCM(float32Array) {
+function floatToPCMBuffer(float32Array) {
   const buffer = new ArrayBuffer(float32Array.length * 2);
   const view = new DataView(buffer);
   
@@ -13,15 +13,20 @@ function floatTo16BitPCM(float32Array) {
     const s = Math.max(-1, Math.min(1, float32Array[i]));
     view.setInt16(i * 2, s < 0 ? s * 0x8000 : s * 0x7FFF, true);
   }
+  return buffer;
+}
+
+function pcmToAudioBuffer(pcmBuffer, audioContext) {
+  const frameCount = Math.floor(pcmBuffer.byteLength / 2);
+  const buffer = audioContext.createBuffer(1, frameCount, 24000);
+  const channelData = buffer.getChannelData(0);
+  const view = new DataView(pcmBuffer);
   
-  // Convert to base64 for transmission
-  let binary = '';
-  const bytes = new Uint8Array(buffer);
-  const len = bytes.byteLength;
-  for (let i = 0; i < len; i += 1024) {
-    binary += String.fromCharCode.apply(null, bytes.subarray(i, Math.min(i + 1024, len)));
+  for (let i = 0; i < frameCount; i++) {
+    const int16 = view.getInt16(i * 2, true);
+    channelData[i] = int16 / 32768.0;
   }
-  return btoa(binary);
+  return buffer;
 }
 
 function base64ToAudioBuffer(base64, audioContext) {
@@ -31,17 +36,7 @@ function base64ToAudioBuffer(base64, audioContext) {
   for (let i = 0; i < len; i++) {
     bytes[i] = binaryString.charCodeAt(i);
   }
-  
-  const frameCount = bytes.length / 2;
-  const buffer = audioContext.createBuffer(1, frameCount, 24000);
-  const channelData = buffer.getChannelData(0);
-  const view = new DataView(bytes.buffer);
-  
-  for (let i = 0; i < frameCount; i++) {
-    const int16 = view.getInt16(i * 2, true);
-    channelData[i] = int16 / 32768.0;
-  }
-  return buffer;
+  return pcmToAudioBuffer(bytes.buffer, audioContext);
 }
 
 class AudioQueue {
@@ -576,19 +571,20 @@ export default function Main() {
           }]);
 
         } else {
-          // Regular text processing (existing logic)
-          // STEP 1: Main Agent decides what to do
-          const mainRes = await fetch(`${API_BASE_URL}/api/main-agent`, {
+          // Regular text processing: Main Agent -> Check Agent -> Synthesis run server-side in one call
+          setAgentStatus("🔍 Check Agent verifying...");
+          const verifyRes = await fetch(`${API_BASE_URL}/api/verify`, {
               method: 'POST',
               headers: { 'Content-Type': 'application/json' },
               body: JSON.stringify({ userText: text })
           });
           
-          if (!mainRes.ok) throw new Error('Main agent failed');
-          const plan = await mainRes.json();
+          if (!verifyRes.ok) throw new Error('Verification failed');
+          const result = await verifyRes.json();
+          const plan = result.plan || {};
 
-          if (plan.action === "DELEGATE_TO_CHECKER") {
-              setAgentStatus("🔍 Check Agent verifying...");
+          if (result.action === "DELEGATE_TO_CHECKER") {
+              const checkResult = result.check || {};
 
               // Add agent communication message
               setMessages(prev => [...prev, {
@@ -598,31 +594,7 @@ export default function Main() {
                 timestamp: new Date()
               }]);
 
-              // STEP 2: Check Agent verification
-              const checkRes = await fetch(`${API_BASE_URL}/api/check-agent`, {
-                  method: 'POST',
-                  headers: { 'Content-Type': 'application/json' },
-                  body: JSON.stringify({ query: plan.checker_query })
-              });
-              
-              if (!checkRes.ok) throw new Error('Check agent failed');
-              const checkResult = await checkRes.json();
-
-              // STEP 3: Synthesis
-              setAgentStatus("✨ Synthesizing response...");
-              const synthRes = await fetch(`${API_BASE_URL}/api/synthesis`, {
-                  method: 'POST',
-                  headers: { 'Content-Type': 'application/json' },
-                  body: JSON.stringify({ 
-                      userQuery: text, 
-                      checkResult: checkResult 
-                  })
-              });
-              
-              if (!synthRes.ok) throw new Error('Synthesis failed');
-              const synthData = await synthRes.json();
-
-              responseText = synthData.text;
+              responseText = result.text;
 
               setMessages(prev => [...prev, { 
                   id: Date.now(), 
@@ -637,9 +609,7 @@ export default function Main() {
                   } 
               }]);
 
-          } else if (plan.action === "SCAN_CRISIS") {
-              setAgentStatus("📡 Crisis Scanner deploying...");
-              
+          } else if (result.action === "SCAN_CRISIS") {
               setMessages(prev => [...prev, { 
                   id: Date.now(), 
                   sender: 'agent-to-agent', 
@@ -647,15 +617,7 @@ export default function Main() {
                   timestamp: new Date() 
               }]);
 
-              // Crisis Scanner
-              const scanRes = await fetch(`${API_BASE_URL}/api/scan-crisis`, {
-                  method: 'POST',
-                  headers: { 'Content-Type': 'application/json' },
-                  body: JSON.stringify({ topic: plan.scan_topic })
-              });
-              
-              if (!scanRes.ok) throw new Error('Scanner failed');
-              const trends = await scanRes.json();
+              const trends = result.trends || [];
 
               // Format results with detailed information and sources
               responseText = `📊 Crisis Scan Complete: ${trends.length} trending claims found\n\n`;
@@ -688,7 +650,7 @@ export default function Main() {
 
           } else {
               // Direct reply
-              responseText = plan.reply_text || "I'm ready to help verify information.";
+              responseText = result.text || plan.reply_text || "I'm ready to help verify information.";
               setMessages(prev => [...prev, { 
                   id: Date.now(), 
                   sender: 'bot', 
@@ -862,8 +824,9 @@ export default function Main() {
       audioContextRef.current = ctx;
       audioQueueRef.current = new AudioQueue(ctx);
 
-      // Connect to WebSocket
-      const ws = new WebSocket(`ws://localhost:8000/ws/live-session`);
+      // Connect to WebSocket (binary=1: audio goes both ways as raw PCM frames, not base64 JSON)
+      const ws = new WebSocket(`ws://localhost:8000/ws/live-session?binary=1`);
+      ws.binaryType = 'arraybuffer';
       websocketRef.current = ws;
 
       ws.onopen = () => {
@@ -878,6 +841,13 @@ export default function Main() {
 
       ws.onmessage = async (event) => {
         try {
+          if (event.data instanceof ArrayBuffer) {
+            // Play 24kHz PCM audio response from Gemini
+            if (audioContextRef.current && audioQueueRef.current) {
+              audioQueueRef.current.addToQueue(pcmToAudioBuffer(event.data, audioContextRef.current));
+            }
+            return;
+          }
           const data = JSON.parse(event.data);
 
           switch (data.type) {
@@ -1000,14 +970,9 @@ export default function Main() {
             downsampledChunk[i] = sourceChunk[sourceIndex] || 0;
           }
           
-          // Convert to 16-bit PCM and send
-          const pcmData = floatTo16BitPCM(downsampledChunk);
-          
+          // Convert to 16-bit PCM and send as a binary frame
           if (ws.readyState === WebSocket.OPEN) {
-            ws.send(JSON.stringify({
-              type: 'audio',
-              audio: pcmData
-            }));
+            ws.send(floatToPCMBuffer(downsampledChunk));
           }
         }
       };